@@ -0,0 +1,10 @@
+"""
+    Benchmarks on synthetic ledgers, run from the repository root with
+    `python -m benchmarks.<name>`. They use a temporary database and never call
+    the exchange-rate API, so placeholder keys are enough to import the application.
+"""
+
+import os
+
+os.environ.setdefault('API_KEY', 'benchmark')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
@@ -0,0 +1,85 @@
+"""
+    Benchmark of the income and expense totals on a synthetic ledger.
+
+    Compares the original ORM sum, which loads every transaction of a type and adds
+    the amounts in Python, with `calculate_totals()` reading the monthly rollup and
+    `calculate_totals(from_date, to_date)` summing the current month in SQL.
+
+    Run from the repository root:
+
+        python -m benchmarks.bench_totals --rows 1000000
+"""
+
+import argparse
+import time
+from datetime import date
+from typing import Callable, Dict, Tuple, TypeVar
+
+from src import db
+from src.models import Transaction
+from src.rollup import rebuild_rollup
+from src.utils import calculate_totals
+from .ledger import benchmark_app, seed_ledger
+
+T = TypeVar('T')
+
+def orm_totals() -> Dict[str, float]:
+    """
+    The original calculate_income and calculate_expense: one ORM query per type,
+    every transaction loaded and summed in Python.
+    """
+    return {category_type: sum(el[0].amount for el in db.session.execute(
+                db.select(Transaction)
+                .filter(Transaction.category.has(category_type=category_type))))
+            for category_type in ('income', 'expense')}
+
+def best_of(repeat: int, function: Callable[[], T]) -> Tuple[T, float]:
+    """
+    Run a function several times with an empty identity map.
+
+    :return: The last result and the fastest run in seconds.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def main() -> None:
+    """
+    Seed the ledger, time every variant and print the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--rows', type=int, default=1000000, help='number of transactions')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per variant, best is shown')
+    arguments = parser.parse_args()
+
+    with benchmark_app():
+        started = time.perf_counter()
+        seed_ledger(arguments.rows)
+        rebuild_rollup()
+        print(f'Seeded {arguments.rows} transactions in {time.perf_counter() - started:.1f} s')
+
+        today = date.today()
+        month = (today.replace(day=1).isoformat(), today.isoformat())
+        variants = [
+            ('ORM sum (original)', max(1, arguments.repeat // 3), orm_totals),
+            ('calculate_totals()', arguments.repeat, calculate_totals),
+            ('calculate_totals(month to date)', arguments.repeat,
+             lambda: calculate_totals(*month)),
+        ]
+        results = {}
+        for name, repeat, function in variants:
+            results[name], seconds = best_of(repeat, function)
+            print(f'{name:<34}{seconds * 1000:>12.1f} ms   '
+                  f'income {results[name]["income"]:.2f}, expense {results[name]["expense"]:.2f}')
+
+        for category_type in ('income', 'expense'):
+            assert abs(results['ORM sum (original)'][category_type]
+                       - results['calculate_totals()'][category_type]) < 0.01
+
+if __name__ == '__main__':
+    main()
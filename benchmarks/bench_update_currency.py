@@ -0,0 +1,79 @@
+"""
+    Benchmark of converting the ledger in place when the default currency changes
+    (CONVERT_ON_READ disabled).
+
+    Compares the original per-row ORM loop, which loads every transaction and budget
+    and multiplies their amounts in Python, with the set-based `update_currency`,
+    which issues one UPDATE per table. Both are committed, as settings_save does.
+
+    Run from the repository root:
+
+        python -m benchmarks.bench_update_currency --rows 200000
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from src import db
+from src.models import Budget, Transaction
+from src.utils import update_currency
+from .ledger import benchmark_app, seed_ledger
+
+RATE = 0.5113
+
+def orm_update_currency(exchange_rate: float) -> None:
+    """
+    The original update_currency: every transaction and budget loaded into the
+    identity map and converted one by one, written by the flush on commit.
+    """
+    for transaction in db.session.execute(db.select(Transaction)).scalars():
+        transaction.amount *= exchange_rate
+    for budget in db.session.execute(db.select(Budget)).scalars():
+        budget.current_budget *= exchange_rate
+        budget.total_budget *= exchange_rate
+
+def ledger_total() -> float:
+    """
+    Sum of all transaction amounts, to check both paths convert the same way.
+    """
+    return db.session.scalar(db.select(db.func.sum(Transaction.amount)))
+
+def timed_commit(convert: Callable[[float], None], exchange_rate: float) -> float:
+    """
+    Convert the ledger and commit, starting from an empty identity map.
+
+    :return: Seconds taken.
+    """
+    db.session.expunge_all()
+    started = time.perf_counter()
+    convert(exchange_rate)
+    db.session.commit()
+    return time.perf_counter() - started
+
+def main() -> None:
+    """
+    Seed the ledger, convert it forth with one path and back with the other, print the timings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--rows', type=int, default=200000, help='number of transactions')
+    arguments = parser.parse_args()
+
+    with benchmark_app():
+        started = time.perf_counter()
+        seed_ledger(arguments.rows)
+        print(f'Seeded {arguments.rows} transactions in {time.perf_counter() - started:.1f} s')
+
+        original = ledger_total()
+        orm_seconds = timed_commit(orm_update_currency, RATE)
+        converted = ledger_total()
+        set_seconds = timed_commit(update_currency, 1 / RATE)
+        restored = ledger_total()
+
+        print(f'{"ORM loop (original)":<28}{orm_seconds * 1000:>12.1f} ms')
+        print(f'{"set-based update_currency":<28}{set_seconds * 1000:>12.1f} ms')
+        assert abs(converted - original * RATE) < 0.01 * arguments.rows
+        assert abs(restored - original) < 0.01 * arguments.rows
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+    Shared setup of the benchmarks: an application bound to a temporary SQLite
+    database and a synthetic ledger.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator
+
+from flask import Flask
+
+from src import db
+from src.models import Budget, Category, Transaction
+
+BATCH_SIZE = 100000
+
+@contextmanager
+def benchmark_app() -> Iterator[Flask]:
+    """
+    Create a bare application with the models on a temporary database,
+    which is removed afterwards.
+
+    :return: The application, its application context is pushed.
+    """
+    directory = tempfile.mkdtemp(prefix='benchmark-')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(directory, "ledger.db")}'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def seed_ledger(rows: int, current_month_share: float = 0.01, seed: int = 1) -> None:
+    """
+    Insert categories, budgets and a synthetic ledger; must run in an application context.
+
+    Dates are spread over 15 years, except for a share of the rows that fall
+    into the current month up to today.
+
+    :param rows: Number of transactions.
+    :param current_month_share: Share of the transactions dated in the current month.
+    :param seed: Seed of the random dates.
+    """
+    categories = [Category(name='Salary', category_type='income'),
+                  Category(name='Interest', category_type='income'),
+                  Category(name='Food', category_type='expense'),
+                  Category(name='Rent', category_type='expense'),
+                  Category(name='Travel', category_type='expense')]
+    db.session.add_all(categories)
+    db.session.flush()
+    category_ids = [category.id for category in categories]
+    db.session.add_all([Budget(category_id=category_id, current_budget=0.0, total_budget=1000.0)
+                        for category_id in [0, *category_ids[2:]]])
+
+    rnd = random.Random(seed)
+    today = date.today()
+
+    def transaction_date() -> str:
+        if rnd.random() < current_month_share:
+            return today.replace(day=1 + rnd.randrange(today.day)).isoformat()
+        return f'{2010 + rnd.randrange(15)}-{1 + rnd.randrange(12):02d}-{1 + rnd.randrange(28):02d}'
+
+    for start in range(0, rows, BATCH_SIZE):
+        db.session.execute(db.insert(Transaction), [
+            {'category_id': category_ids[index % len(category_ids)],
+             'description': f'row {index}',
+             'amount': float(1 + index % 50),
+             'original_amount': float(1 + index % 50),
+             'original_currency': 'BGN',
+             'date': transaction_date()}
+            for index in range(start, min(start + BATCH_SIZE, rows))
+        ])
+    db.session.commit()
@@ -1,16 +1,16 @@
 """
     Main entry point of the application.
     
-    This module initializes and runs the Flask application.
-    It creates the application context and sets up the database.
+    This module initializes and runs the Flask application;
+    `create_app` sets up the database.
 """
 
-from src import create_app, db
+from src import create_app
 
-app = create_app()
-
-with app.app_context():
-    db.create_all()
+# Import worker processes load this module again as __mp_main__; they only parse
+# files and must not create the application or touch the database.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
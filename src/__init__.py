@@ -2,7 +2,7 @@
 This module initializes the Flask application and sets up configurations.
 
 It defines the `create_app` function to initialize Flask, set configurations,
-initialize the database and register blueprints.
+initialize the database, bring its schema and monthly rollup up to date and register blueprints.
 """
 import importlib
 
@@ -11,7 +11,7 @@ from flask_sqlalchemy import SQLAlchemy
 import matplotlib
 
 from src import config
-from src.utils_api import load_default_currency
+from src.utils_api import load_default_currency, load_ledger_currency, currency_catalogue
 
 matplotlib.use('Agg')
 
@@ -25,8 +25,6 @@ def create_app() -> Flask:
     """
     app = Flask(__name__)
     app.secret_key = config.SECRET_KEY
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///my_database.db'
-
     app.config.from_pyfile('../src/config.py')
 
     db.init_app(app)
@@ -36,5 +34,26 @@ def create_app() -> Flask:
         app.register_blueprint(bp)
 
     config.DEFAULT_CURRENCY = load_default_currency()
+    config.LEDGER_CURRENCY = load_ledger_currency()
+    currency_catalogue.start_refresh()
+
+    # pylint: disable-next=import-outside-toplevel
+    from src.utils import to_display_amount, get_display_currency
+    app.add_template_filter(to_display_amount, 'display_amount')
+    app.add_template_global(get_display_currency, 'display_currency')
+
+    from src.ledger_version import register_ledger_events  # pylint: disable=import-outside-toplevel
+    register_ledger_events()
+
+    from src.query_guard import register_query_guard  # pylint: disable=import-outside-toplevel
+    register_query_guard(app)
+
+    from src.rollup import rollup_cli  # pylint: disable=import-outside-toplevel
+    app.cli.add_command(rollup_cli)
+
+    from src.schema import upgrade_schema  # pylint: disable=import-outside-toplevel
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
 
     return app
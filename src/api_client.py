@@ -0,0 +1,228 @@
+"""
+    Shared HTTP client for the ExchangeRate API.
+    Provides connection pooling, retries within a deadline, a circuit breaker
+    and per-endpoint metrics.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response statuses worth another attempt.
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised when a request is refused because the circuit breaker is open.
+    """
+
+
+class ApiClient:
+    """
+    A pooled, instrumented HTTP client.
+
+    Attributes:
+        base_url (str): URL prepended to every request path.
+        timeout (Tuple[float, float]): Connect and read timeouts in seconds.
+        retries (int): Maximum number of retries per call.
+        backoff (float): Seconds waited before the first retry, doubled for every further one.
+        deadline (float): Seconds a call may take including all of its retries.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial request is allowed.
+    """
+    def __init__(self, base_url: str, timeout: Tuple[float, float], retries: int,
+                 backoff: float, deadline: float, pool_size: int, failure_threshold: int,
+                 reset_timeout: float) -> None:
+        """
+        Initializes the client and its pooled session.
+
+        :param base_url: URL prepended to every request path.
+        :param timeout: Connect and read timeouts in seconds.
+        :param retries: Maximum number of retries per call.
+        :param backoff: Seconds waited before the first retry, doubled for every further one.
+        :param deadline: Seconds a call may take including all of its retries.
+        :param pool_size: Maximum number of kept-alive connections.
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :param reset_timeout: Seconds the circuit stays open before a trial request is allowed.
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+
+    def get_json(self, endpoint: str, path: str) -> Dict[str, Any]:
+        """
+        Send a GET request and decode the JSON body, within the deadline.
+
+        :param endpoint: Name under which the request is reported in the metrics.
+        :param path: Path appended to the base URL.
+        :return: The decoded JSON response.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        :raises requests.RequestException: If the request fails or returns an error status.
+        """
+        self._before_request(endpoint)
+
+        start = time.perf_counter()
+        try:
+            response = self._get(f'{self.base_url}{path}', start + self.deadline)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            self._record(endpoint, time.perf_counter() - start, failed=True)
+            if isinstance(exc, requests.RequestException):
+                raise
+            raise requests.RequestException(f'Invalid JSON from {endpoint}') from exc
+
+        self._record(endpoint, time.perf_counter() - start, failed=False)
+        return data
+
+    def _get(self, url: str, deadline: float) -> requests.Response:
+        """
+        Send a GET request, retrying connection errors and retryable statuses with backoff.
+
+        Every attempt's timeouts are cut to the time left before the deadline, and no retry
+        is started that could not finish its backoff in time, so a call never takes much
+        longer than the deadline. Read timeouts are not retried.
+
+        :param url: The URL to request.
+        :param deadline: `time.perf_counter()` value the call must finish by.
+        :return: The last response.
+        :raises requests.RequestException: If the last attempt failed.
+        """
+        attempt = 0
+        while True:
+            remaining = max(deadline - time.perf_counter(), 0.001)
+            timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+            try:
+                response = self.session.get(url, timeout=timeout)
+            except requests.ConnectionError:
+                if not self._can_retry(attempt, deadline):
+                    raise
+            else:
+                if (response.status_code not in RETRY_STATUSES
+                        or not self._can_retry(attempt, deadline)):
+                    return response
+                response.close()
+
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def _can_retry(self, attempt: int, deadline: float) -> bool:
+        """
+        Check whether another attempt is allowed and its backoff ends before the deadline.
+
+        :param attempt: Number of the attempt that just failed, starting at 0.
+        :param deadline: `time.perf_counter()` value the call must finish by.
+        :return: True if the call should be retried.
+        """
+        return (attempt < self.retries
+                and time.perf_counter() + self.backoff * 2 ** attempt < deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the circuit state and the per-endpoint metrics.
+
+        :return: A dictionary with the circuit state, request and error counts and
+                 cumulative latency histograms per endpoint.
+        """
+        with self._lock:
+            return {
+                'circuit': 'open' if self._is_open() else 'closed',
+                'consecutive_failures': self._failures,
+                'endpoints': {
+                    name: {
+                        'requests': metric['requests'],
+                        'errors': metric['errors'],
+                        'rejected': metric['rejected'],
+                        'latency_sum': metric['latency_sum'],
+                        'latency_buckets': dict(zip([*map(str, LATENCY_BUCKETS), '+Inf'],
+                                                    metric['latency_buckets']))
+                    }
+                    for name, metric in self._metrics.items()
+                }
+            }
+
+    def _before_request(self, endpoint: str) -> None:
+        """
+        Refuse the request while the circuit is open.
+
+        :param endpoint: Name of the endpoint being called.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        """
+        with self._lock:
+            if self._is_open():
+                self._metric(endpoint)['rejected'] += 1
+                raise CircuitOpenError(f'Circuit open, skipping request to {endpoint}')
+            if self._failures >= self.failure_threshold:
+                # Half-open: let this request through as a trial and re-open on failure.
+                self._opened_at = time.monotonic()
+
+    def _is_open(self) -> bool:
+        """
+        Check whether the circuit breaker currently refuses requests.
+
+        :return: True if the circuit is open, False otherwise.
+        """
+        return (self._failures >= self.failure_threshold
+                and time.monotonic() - self._opened_at < self.reset_timeout)
+
+    def _record(self, endpoint: str, latency: float, failed: bool) -> None:
+        """
+        Update the metrics and the circuit breaker after a request.
+
+        :param endpoint: Name of the endpoint that was called.
+        :param latency: Request duration in seconds.
+        :param failed: Whether the request failed.
+        """
+        with self._lock:
+            metric = self._metric(endpoint)
+            metric['requests'] += 1
+            metric['latency_sum'] += latency
+            buckets: List[int] = metric['latency_buckets']
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    buckets[i] += 1
+            buckets[-1] += 1
+
+            if failed:
+                metric['errors'] += 1
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._opened_at = time.monotonic()
+            else:
+                self._failures = 0
+
+    def _metric(self, endpoint: str) -> Dict[str, Any]:
+        """
+        Return the metrics record of an endpoint, creating it on first use.
+
+        :param endpoint: Name of the endpoint.
+        :return: The mutable metrics record.
+        """
+        if endpoint not in self._metrics:
+            self._metrics[endpoint] = {
+                'requests': 0,
+                'errors': 0,
+                'rejected': 0,
+                'latency_sum': 0.0,
+                'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1)
+            }
+        return self._metrics[endpoint]
@@ -0,0 +1,98 @@
+"""
+    Cache of rendered chart images.
+    Charts are keyed by a hash of the data they show, and the whole cache is
+    dropped whenever the ledger version changes.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class ChartCache:
+    """
+    A size-bounded LRU cache of rendered charts.
+
+    Attributes:
+        max_size (int): Maximum number of charts kept (least recently used are evicted).
+        version (int): The ledger version the cached charts were rendered for.
+    """
+    def __init__(self, max_size: int) -> None:
+        """
+        Initializes an empty cache.
+
+        :param max_size: Maximum number of charts kept.
+        """
+        self.max_size = max_size
+        self.version: Optional[int] = None
+        self._charts: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(chart_type: str, data: Any) -> str:
+        """
+        Build the cache key of a chart.
+
+        :param chart_type: The kind of chart.
+        :param data: JSON-serializable data the chart is drawn from.
+        :return: The SHA-256 of the chart type and data.
+        """
+        payload = json.dumps([chart_type, data], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, version: int) -> Optional[bytes]:
+        """
+        Look up a chart, dropping every chart if the ledger changed since they were cached.
+
+        :param key: The cache key, see `key`.
+        :param version: The current ledger version.
+        :return: The image bytes if cached, else None.
+        """
+        with self._lock:
+            if version != self.version:
+                self._charts.clear()
+                self.version = version
+            image = self._charts.get(key)
+            if image is None:
+                self._misses += 1
+                return None
+            self._charts.move_to_end(key)
+            self._hits += 1
+            return image
+
+    def set(self, key: str, version: int, image: bytes) -> None:
+        """
+        Store a chart rendered for a ledger version.
+
+        :param key: The cache key, see `key`.
+        :param version: The ledger version the chart was rendered for.
+        :param image: The image bytes.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            self._charts[key] = image
+            self._charts.move_to_end(key)
+            while len(self._charts) > self.max_size:
+                self._charts.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every cached chart.
+        """
+        with self._lock:
+            self._charts.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the cache usage.
+
+        :return: Number of cached charts, hits and misses.
+        """
+        with self._lock:
+            return {'size': len(self._charts), 'hits': self._hits, 'misses': self._misses}
@@ -0,0 +1,93 @@
+"""
+    Chart rendering for the reports.
+    Every chart is drawn on its own `Figure` with an Agg canvas instead of the global
+    pyplot state, on a bounded pool of render threads.
+"""
+
+import io
+import threading
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+class ChartBusyError(Exception):
+    """
+    Raised when too many charts are waiting to be rendered.
+    """
+
+
+class ChartTimeoutError(Exception):
+    """
+    Raised when a chart is not rendered in time.
+    """
+
+
+class ChartRenderer:
+    """
+    Renders charts on a bounded pool of threads.
+
+    Attributes:
+        workers (int): Number of charts rendered at the same time.
+        max_pending (int): Maximum number of charts rendering or waiting for a thread.
+        timeout (float): Seconds a request waits for its chart.
+    """
+    def __init__(self, workers: int, max_pending: int, timeout: float) -> None:
+        """
+        Initializes the render pool.
+
+        :param workers: Number of charts rendered at the same time.
+        :param max_pending: Maximum number of charts rendering or waiting for a thread.
+        :param timeout: Seconds a request waits for its chart.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chart')
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers))
+
+    def render(self, draw: Callable[..., bytes], *args: Any) -> bytes:
+        """
+        Render a chart on the pool and wait for it.
+
+        :param draw: Function drawing the chart and returning the image bytes.
+        :param args: Arguments of the function.
+        :return: The image bytes.
+        :raises ChartBusyError: If too many charts are already waiting.
+        :raises ChartTimeoutError: If the chart was not ready in time; it still finishes
+                                   in the background and frees its slot then.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ChartBusyError()
+        try:
+            future = self._executor.submit(draw, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError as exc:
+            raise ChartTimeoutError() from exc
+
+def render_pie_chart(totals: List[Tuple[str, float]]) -> bytes:
+    """
+    Draws a pie chart of category totals.
+
+    :param totals: List of (category name, total) to draw.
+    :return: The PNG image.
+    """
+    labels = [name for name, _ in totals]
+    sizes = [total for _, total in totals]
+    colors = colormaps['Paired'](range(len(labels))).tolist()
+
+    figure = Figure(figsize=(6, 6))
+    FigureCanvasAgg(figure)
+    figure.subplots().pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%')
+
+    output = io.BytesIO()
+    figure.savefig(output, format='png')
+    return output.getvalue()
@@ -17,6 +17,80 @@ if not API_KEY:
 if not SECRET_KEY:
     raise ValueError('No Secret key provided!')
 
-BASE_URL = f'https://v6.exchangerate-api.com/v6/{API_KEY}'
+SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///my_database.db')
+
+API_URL = os.getenv('API_URL', 'https://v6.exchangerate-api.com/v6')
+BASE_URL = f'{API_URL}/{API_KEY}'
+
+# HTTP client for the exchange-rate API: timeouts in seconds, retries with backoff, the
+# deadline in seconds of a call including its retries, pool size and the circuit breaker
+# that stops calling a failing upstream for a while.
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', '3'))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', '5'))
+API_RETRIES = int(os.getenv('API_RETRIES', '2'))
+API_BACKOFF = float(os.getenv('API_BACKOFF', '0.3'))
+API_DEADLINE = float(os.getenv('API_DEADLINE', '8'))
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', '10'))
+API_FAILURE_THRESHOLD = int(os.getenv('API_FAILURE_THRESHOLD', '5'))
+API_RESET_TIMEOUT = float(os.getenv('API_RESET_TIMEOUT', '30'))
 
 DEFAULT_CURRENCY = ''
+
+# Currency the stored amounts are kept in. With CONVERT_ON_READ the ledger is never rewritten
+# when the default currency changes, amounts are converted to the default currency when shown.
+LEDGER_CURRENCY = ''
+CONVERT_ON_READ = os.getenv('CONVERT_ON_READ', 'true').lower() == 'true'
+
+# Exchange-rate cache: lifetime of a rate in seconds, maximum number of pairs kept
+# in memory and an optional SQLite file that keeps the rates across restarts.
+RATE_CACHE_TTL = int(os.getenv('RATE_CACHE_TTL', '3600'))
+RATE_CACHE_MAX_SIZE = int(os.getenv('RATE_CACHE_MAX_SIZE', '1024'))
+RATE_CACHE_PATH = os.getenv('RATE_CACHE_PATH', '')
+
+# 'sheet' fetches all rates for the default currency at once and derives every pair locally,
+# 'pair' asks the API for each currency pair separately.
+RATE_SOURCE = os.getenv('RATE_SOURCE', 'sheet')
+
+# Supported currency codes: refresh interval in seconds and the on-disk snapshot of the list.
+CURRENCY_CODES_REFRESH = int(os.getenv('CURRENCY_CODES_REFRESH', '86400'))
+CURRENCY_CODES_SNAPSHOT = os.getenv('CURRENCY_CODES_SNAPSHOT', 'currency_codes.json')
+
+# Number of CSV rows read, validated and written at a time during imports.
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '10000'))
+
+# Imports run in background worker threads; uploads are spooled to IMPORT_SPOOL_DIR first.
+# SQLite allows a single writer, so concurrent imports can fail with "database is locked";
+# only raise IMPORT_WORKERS on a database that supports concurrent writes.
+IMPORT_BACKGROUND = os.getenv('IMPORT_BACKGROUND', 'true').lower() == 'true'
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '1'))
+IMPORT_SPOOL_DIR = os.getenv('IMPORT_SPOOL_DIR', '')
+
+# Worker processes that parse and validate the files of a multi-file or ZIP import,
+# 0 uses one per CPU core.
+IMPORT_PROCESSES = int(os.getenv('IMPORT_PROCESSES', '0'))
+
+# Limits for ZIP uploads: number of files and their total uncompressed size in megabytes.
+IMPORT_MAX_ARCHIVE_FILES = int(os.getenv('IMPORT_MAX_ARCHIVE_FILES', '100'))
+IMPORT_MAX_ARCHIVE_MB = int(os.getenv('IMPORT_MAX_ARCHIVE_MB', '512'))
+
+# Number of transactions fetched from the database and written per batch by ledger exports.
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '10000'))
+
+# Transactions shown per page on the home and report pages, and the most a client may ask for.
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+
+# Most SQL statements a request may execute, 0 disables the check. Exceeding it fails
+# the request while testing and logs a warning otherwise.
+MAX_QUERIES_PER_REQUEST = int(os.getenv('MAX_QUERIES_PER_REQUEST', '50'))
+
+# Seconds a report filter token stays valid for exports and charts.
+REPORT_TOKEN_MAX_AGE = int(os.getenv('REPORT_TOKEN_MAX_AGE', '3600'))
+
+# Number of rendered charts kept in memory.
+CHART_CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', '64'))
+
+# Chart render pool: threads, charts allowed to wait for one, and seconds a request waits.
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', '2'))
+CHART_RENDER_QUEUE = int(os.getenv('CHART_RENDER_QUEUE', '8'))
+CHART_RENDER_TIMEOUT = float(os.getenv('CHART_RENDER_TIMEOUT', '10'))
@@ -0,0 +1,184 @@
+"""
+    Process-wide catalogue of the currency codes supported by the exchange-rate API.
+    Keeps the code list in memory, refreshes it periodically in the background and
+    stores a snapshot on disk so a restart does not have to wait for the API.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, FrozenSet, List, Optional
+
+FALLBACK_CODES = ['USD', 'EUR', 'BGN']
+
+logger = logging.getLogger(__name__)
+
+class CurrencyCatalogue:
+    """
+    Memoized list of supported currency codes.
+
+    Attributes:
+        refresh_interval (float): Number of seconds before the code list is fetched again.
+        snapshot_path (str): Path to the JSON snapshot of the code list, empty to disable it.
+        retry_interval (float): Number of seconds before a failed fetch is retried.
+    """
+    def __init__(self, fetch: Callable[[], Optional[List[str]]], refresh_interval: float,
+                 snapshot_path: str = '', retry_interval: float = 60) -> None:
+        """
+        Initializes the catalogue.
+
+        :param fetch: Callable returning the codes from the API, or None if the call failed.
+        :param refresh_interval: Number of seconds before the code list is fetched again.
+        :param snapshot_path: Path to the JSON snapshot of the code list.
+        :param retry_interval: Number of seconds before a failed fetch is retried.
+        """
+        self.refresh_interval = refresh_interval
+        self.snapshot_path = snapshot_path
+        self.retry_interval = retry_interval
+        self._fetch = fetch
+        self._codes: List[str] = []
+        self._code_set: FrozenSet[str] = frozenset()
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def codes(self) -> List[str]:
+        """
+        Return the supported currency codes, loading them if the cached list is stale.
+
+        :return: A list of supported currency codes.
+        """
+        self._ensure_loaded()
+        return list(self._codes)
+
+    def code_set(self) -> FrozenSet[str]:
+        """
+        Return the supported currency codes as a frozenset for fast membership checks.
+
+        :return: A frozenset of supported currency codes.
+        """
+        self._ensure_loaded()
+        return self._code_set
+
+    def refresh(self) -> bool:
+        """
+        Fetch the code list from the API and update the cache and the snapshot.
+
+        :return: True if the list was refreshed, False if the API call failed.
+        """
+        codes = self._fetch()
+        with self._lock:
+            if not codes:
+                if not self._codes:
+                    self._store(FALLBACK_CODES)
+                self._expires_at = time.time() + self.retry_interval
+                return False
+
+            self._store(codes)
+            self._expires_at = time.time() + self.refresh_interval
+
+        if self.snapshot_path:
+            self._save_snapshot(codes)
+        return True
+
+    def start_refresh(self) -> None:
+        """
+        Start a daemon thread that refreshes the code list every refresh interval.
+
+        The first refresh waits until the current list expires, so a list that was
+        just loaded from the snapshot or the API is not fetched again straight away.
+        """
+        if self._refresher is not None:
+            return
+
+        def refresh_loop() -> None:
+            time.sleep(max(self._expires_at - time.time(), 0))
+            while True:
+                try:
+                    self.refresh()
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception('Refreshing the currency codes failed')
+                    self._expires_at = time.time() + self.retry_interval
+                time.sleep(max(self._expires_at - time.time(), self.retry_interval))
+
+        self._refresher = threading.Thread(target=refresh_loop, name='currency-catalogue',
+                                           daemon=True)
+        self._refresher.start()
+
+    def _ensure_loaded(self) -> None:
+        """
+        Load the code list from the snapshot on first use and refresh it once it expires.
+
+        Once the background refresher runs, callers are served the current list and never
+        wait for the API.
+        """
+        if not self._codes and self._load_snapshot():
+            return
+        if self._codes and self._refresher is not None:
+            return
+        if time.time() >= self._expires_at:
+            self.refresh()
+
+    def _load_snapshot(self) -> bool:
+        """
+        Load the code list from the snapshot file.
+
+        The snapshot is trusted for one refresh interval counted from its modification time.
+
+        :return: True if a usable snapshot was loaded, False otherwise.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as fp:
+                codes = json.load(fp)
+        except (OSError, ValueError):
+            return False
+
+        if not codes:
+            return False
+
+        with self._lock:
+            self._store(codes)
+            self._expires_at = os.path.getmtime(self.snapshot_path) + self.refresh_interval
+        return True
+
+    def _save_snapshot(self, codes: List[str]) -> None:
+        """
+        Write the code list to the snapshot file.
+
+        The list is written to a temporary file that then replaces the snapshot, so a reader
+        never sees a half-written file. If it cannot be written the error is logged and the
+        codes are only kept in memory.
+
+        :param codes: The list of currency codes.
+        """
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix='.currency-codes-', suffix='.json',
+                                             dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+                    json.dump(codes, fp)
+                os.replace(temp_path, self.snapshot_path)
+            except OSError:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
+                raise
+        except OSError as e:
+            logger.warning('Could not save the currency code snapshot to %s: %s',
+                           self.snapshot_path, e)
+
+    def _store(self, codes: List[str]) -> None:
+        """
+        Replace the cached code list.
+
+        :param codes: The new list of currency codes.
+        """
+        self._codes = list(codes)
+        self._code_set = frozenset(codes)
@@ -0,0 +1,93 @@
+"""
+    Version number of the ledger data.
+    Stored in the database and bumped in the same transaction as every write to
+    transactions, categories or budgets, so caches of data derived from the ledger
+    (charts, ETags) can tell when they became stale, in every process sharing the database.
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from src import db
+from src.models import Transaction, Category, Budget, LedgerVersion
+
+LEDGER_MODELS = (Transaction, Category, Budget)
+LEDGER_TABLES = frozenset(model.__table__.name for model in LEDGER_MODELS)
+LEDGER_VERSION_ID = 1
+
+def current_ledger_version() -> int:
+    """
+    Read the current ledger version.
+
+    :return: The version, 0 if the ledger was never written.
+    """
+    version = db.session.scalar(db.select(LedgerVersion.version)
+                                .where(LedgerVersion.id == LEDGER_VERSION_ID))
+    return version or 0
+
+def bump_ledger_version(session: Session) -> None:
+    """
+    Move the ledger to a new version within the session's transaction.
+
+    The first version starts from the clock, so versions of a recreated database
+    do not repeat those of an earlier one.
+
+    :param session: The session whose transaction wrote to the ledger.
+    """
+    result: Any = session.execute(
+        db.update(LedgerVersion)
+        .where(LedgerVersion.id == LEDGER_VERSION_ID)
+        .values(version=LedgerVersion.version + 1)
+    )
+    if not result.rowcount:
+        session.execute(db.insert(LedgerVersion).values(id=LEDGER_VERSION_ID,
+                                                        version=time.time_ns() // 1000))
+
+def register_ledger_events() -> None:
+    """
+    Track ledger writes on every session: ORM flushes and bulk INSERT/UPDATE/DELETE
+    statements mark the session, and its commit bumps the version.
+    """
+    if event.contains(Session, 'before_commit', _before_commit):
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'do_orm_execute', _do_orm_execute)
+    event.listen(Session, 'before_commit', _before_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+
+def _after_flush(session: Session, _flush_context: UOWTransaction) -> None:
+    """
+    Mark the session if the flush wrote ledger rows.
+    """
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, LEDGER_MODELS):
+            session.info['ledger_changed'] = True
+            return
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    """
+    Mark the session if a bulk statement writes ledger rows.
+    """
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table: Any = getattr(state.statement, 'table', None)
+    if table is not None and getattr(table, 'name', None) in LEDGER_TABLES:
+        state.session.info['ledger_changed'] = True
+
+def _before_commit(session: Session) -> None:
+    """
+    Flush the pending writes and bump the version if any of them wrote to the ledger,
+    so the new version is committed together with the writes.
+    """
+    session.flush()
+    if session.info.pop('ledger_changed', False):
+        bump_ledger_version(session)
+
+def _after_rollback(session: Session) -> None:
+    """
+    Forget the writes of a rolled back transaction.
+    """
+    session.info.pop('ledger_changed', None)
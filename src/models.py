@@ -4,7 +4,7 @@
 
 from typing import List, Optional
 
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src import db
@@ -52,18 +52,29 @@ class Transaction(db.Model):
         id (int): The unique identifier for the transaction.
         category_id (int): The ID of the category associated with this transaction.
         description (str): A description of the transaction.
-        amount (float): The amount of the transaction (not nullable).
+        amount (float): The amount of the transaction in the ledger currency (not nullable).
+        original_amount (float): The amount as entered or imported.
+        original_currency (str): The currency code the amount was entered or imported in.
         date (str): The date of the transaction (not nullable).
+        fingerprint (str): SHA-256 of the identifying fields, indexed to detect re-imported rows.
         category (Category): The category associated with this transaction.
     """
     id: Mapped[int] = mapped_column(primary_key=True)
-    category_id: Mapped[int] = mapped_column(ForeignKey('category.id'), nullable=False)
+    category_id: Mapped[int] = mapped_column(ForeignKey('category.id'), nullable=False, index=True)
     description: Mapped[Optional[str]] = mapped_column(String(200))
-    amount: Mapped[float] = mapped_column(nullable=False)
+    amount: Mapped[float] = mapped_column(nullable=False, index=True)
+    original_amount: Mapped[Optional[float]] = mapped_column()
+    original_currency: Mapped[Optional[str]] = mapped_column(String(3))
     date: Mapped[str] = mapped_column(nullable=False)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), index=True)
 
     category: Mapped['Category'] = relationship(back_populates='transactions')
 
+    # Serves date ranges and, without reading the table, per-category sums over them.
+    __table_args__ = (
+        Index('ix_transaction_date_category_amount', 'date', 'category_id', 'amount'),
+    )
+
     def __repr__(self) -> str:
         """
         Returns a string representation of the Transaction instance.
@@ -92,8 +103,8 @@ class Budget(db.Model):
     Attributes:
         id (int): The unique identifier for the budget.
         category_id (int): The ID of the category associated with this budget.
-        current_budget (float): The current budget amount (not nullable).
-        total_budget (float): The total budget amount (not nullable).
+        current_budget (float): The current budget amount in the ledger currency (not nullable).
+        total_budget (float): The total budget amount in the ledger currency (not nullable).
         category (Category): The category associated with this budget.
     """
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -121,3 +132,100 @@ class Budget(db.Model):
         :return: A formatted string with budget details.
         """
         return f'<Current_expense {self.current_budget}, Max_expense: {self.total_budget}>'
+
+class MonthlyRollup(db.Model):
+    """
+    Total and number of transactions per month and category, kept up to date on every write.
+
+    Attributes:
+        id (int): The unique identifier for the rollup row.
+        month (str): The month in 'YYYY-MM' format (not nullable).
+        category_id (int): The ID of the category (not nullable).
+        total (float): Sum of the amounts in the ledger currency (not nullable).
+        count (int): Number of transactions (not nullable).
+    """
+    id: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), nullable=False)
+    category_id: Mapped[int] = mapped_column(ForeignKey('category.id'), nullable=False)
+    total: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('month', 'category_id'),
+    )
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the MonthlyRollup instance.
+
+        :return: A string describing the MonthlyRollup.
+        """
+        return (f'MonthlyRollup(month={self.month}, category_id={self.category_id}, '
+                f'total={self.total}, count={self.count})')
+
+    def __str__(self) -> str:
+        """
+        Returns a user-friendly string representation of the MonthlyRollup instance.
+
+        :return: A formatted string with rollup details.
+        """
+        return f'<MonthlyRollup {self.month}, Category: {self.category_id}, Total: {self.total}>'
+
+class ImportCheckpoint(db.Model):
+    """
+    Records how far a streamed import got, so an interrupted import can be resumed.
+
+    Attributes:
+        id (int): The unique identifier for the checkpoint.
+        file_hash (str): SHA-256 of the imported file (unique and not nullable).
+        rows_done (int): Number of data rows already committed or rejected (not nullable).
+        completed (bool): Whether the whole file was imported (not nullable).
+    """
+    id: Mapped[int] = mapped_column(primary_key=True)
+    file_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    rows_done: Mapped[int] = mapped_column(nullable=False, default=0)
+    completed: Mapped[bool] = mapped_column(nullable=False, default=False)
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the ImportCheckpoint instance.
+
+        :return: A string describing the ImportCheckpoint.
+        """
+        return f'ImportCheckpoint(file_hash={self.file_hash}, rows_done={self.rows_done})'
+
+    def __str__(self) -> str:
+        """
+        Returns a user-friendly string representation of the ImportCheckpoint instance.
+
+        :return: A formatted string with checkpoint details.
+        """
+        return f'<ImportCheckpoint {self.file_hash[:12]}, Rows: {self.rows_done}>'
+
+class LedgerVersion(db.Model):
+    """
+    Version number of the ledger data, a single row bumped in the same database
+    transaction as every write to transactions, categories or budgets.
+
+    Attributes:
+        id (int): The unique identifier for the row, always 1.
+        version (int): The current version (not nullable).
+    """
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the LedgerVersion instance.
+
+        :return: A string describing the LedgerVersion.
+        """
+        return f'LedgerVersion(version={self.version})'
+
+    def __str__(self) -> str:
+        """
+        Returns a user-friendly string representation of the LedgerVersion instance.
+
+        :return: A formatted string with the version.
+        """
+        return f'<LedgerVersion {self.version}>'
@@ -0,0 +1,134 @@
+"""
+    Parquet import and export of transactions.
+    pyarrow is optional: without it Parquet files are rejected and the ledger
+    export is unavailable, while CSV keeps working.
+"""
+
+import logging
+from typing import IO, Iterable, Iterator, Sequence
+
+import pandas as pd
+
+from src import db
+from src.models import Transaction, Category
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the installation
+    pa = None
+    pc = None
+    pq = None
+
+PARQUET_AVAILABLE = pq is not None
+
+logger = logging.getLogger(__name__)
+
+def read_parquet_chunks(stream: IO[bytes], columns: Iterable[str],
+                        chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read a Parquet file in batches of typed columns.
+
+    Dates stay datetimes and amounts stay numbers, so validation does not parse text.
+
+    :param stream: The uploaded file.
+    :param columns: The columns to read.
+    :param chunk_size: Number of rows per batch.
+    :return: An iterator over the batches.
+    :raises ValueError: If the file is not a Parquet file or lacks one of the columns.
+    """
+    try:
+        parquet_file = pq.ParquetFile(stream)
+    except (pa.ArrowException, OSError) as exc:
+        raise ValueError('Invalid Parquet file!') from exc
+
+    columns = sorted(columns)
+    missing = set(columns) - set(parquet_file.schema_arrow.names)
+    if missing:
+        raise ValueError(f'Invalid file format! Expected columns: {", ".join(columns)}')
+
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas(date_as_object=False)
+
+def ledger_schema() -> 'pa.Schema':
+    """
+    Describe the columns of the ledger export.
+
+    :return: The Arrow schema of the export.
+    """
+    return pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.date32()),
+        ('category', pa.string()),
+        ('category_type', pa.string()),
+        ('description', pa.string()),
+        ('amount', pa.float64()),
+        ('currency', pa.string()),
+        ('original_amount', pa.float64()),
+        ('original_currency', pa.string())
+    ])
+
+def date_column(ids: Sequence[int], dates: Sequence[str]) -> 'pa.Array':
+    """
+    Parse 'YYYY-MM-DD' dates into a date column.
+
+    Dates that cannot be parsed become null, and the IDs of their transactions are logged.
+
+    :param ids: IDs of the transactions.
+    :param dates: The stored dates.
+    :return: The date column.
+    """
+    text = pa.array(dates, pa.string())
+    parsed = pc.strptime(text, format='%Y-%m-%d', unit='s', error_is_null=True)
+    invalid = pc.and_(pc.is_valid(text), pc.is_null(parsed))
+    if pc.any(invalid).as_py():
+        invalid_ids = pc.filter(pa.array(ids, pa.int64()), invalid).to_pylist()
+        logger.warning('Exported %d transaction(s) with an invalid date as null, IDs: %s',
+                       len(invalid_ids), ', '.join(map(str, invalid_ids)))
+    return parsed.cast(pa.date32())
+
+def write_ledger_parquet(sink: IO[bytes], ledger_currency: str, batch_size: int) -> int:
+    """
+    Write every transaction to a Parquet file, one row group per database batch.
+
+    Rows are streamed from the database cursor and turned into columns batch by batch,
+    so memory use does not grow with the size of the ledger. Amounts are in the ledger
+    currency; the file can be imported again since it has the import columns.
+    Invalid dates are written as null, see `date_column`.
+
+    :param sink: The file to write to.
+    :param ledger_currency: The currency the amounts are stored in.
+    :param batch_size: Number of transactions fetched and written at a time.
+    :return: Number of transactions written.
+    """
+    schema = ledger_schema()
+    result = db.session.execute(
+        db.select(Transaction.id, Transaction.date, Category.name, Category.category_type,
+                  Transaction.description, Transaction.amount,
+                  Transaction.original_amount, Transaction.original_currency)
+        .join(Category)
+        .order_by(Transaction.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    written = 0
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in result.partitions():
+            (ids, dates, categories, category_types, descriptions,
+             amounts, original_amounts, original_currencies) = zip(*rows)
+            writer.write_batch(pa.record_batch([
+                pa.array(ids, pa.int64()),
+                date_column(ids, dates),
+                pa.array(categories, pa.string()),
+                pa.array(category_types, pa.string()),
+                pa.array(descriptions, pa.string()),
+                pa.array(amounts, pa.float64()),
+                pa.array([ledger_currency] * len(rows), pa.string()),
+                pa.array(original_amounts, pa.float64()),
+                pa.array(original_currencies, pa.string())
+            ], schema=schema))
+            written += len(rows)
+        if not written:
+            writer.write_table(schema.empty_table())
+    return written
@@ -0,0 +1,196 @@
+"""
+    PDF statements of transactions.
+    Rows arrive in batches from a database cursor and are laid out page by page,
+    one text block per column, so long statements render quickly. Memory is not bounded:
+    the ReportLab canvas holds every finished page until the document is saved,
+    about 10 KB per page of 35 rows.
+"""
+
+from typing import IO, Dict, Iterable, List, Sequence, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# (date, category name, description, amount in the ledger currency, category type)
+# of one transaction.
+ReportRow = Tuple[str, str, str, float, str]
+
+TITLE = 'Transaction Report'
+FONT = 'Helvetica'
+FONT_SIZE = 10
+ROW_HEIGHT = 20
+PAGE_TOP = 750
+PAGE_BOTTOM = 50
+# Left edge of every column and the title of its header.
+COLUMNS: Tuple[Tuple[int, str], ...] = (
+    (50, 'Date'),
+    (130, 'Category'),
+    (250, 'Description'),
+    (400, 'Amount'),
+    (500, 'Currency')
+)
+
+class PdfStatement:
+    """
+    Lays out table rows on letter pages and writes the document to a file.
+
+    The canvas keeps the finished pages in memory until `save` writes the document.
+
+    Attributes:
+        pdf (Canvas): The ReportLab canvas the pages are drawn on.
+        page (int): Number of the current page.
+        y_position (int): Vertical position of the next row on the current page.
+        pending (list[list[str]]): Rows waiting to be drawn on the current page.
+    """
+    def __init__(self, sink: IO[bytes]) -> None:
+        """
+        Starts the first page with the report title.
+
+        :param sink: The file the document is written to.
+        """
+        self.pdf = canvas.Canvas(sink, pagesize=letter, pageCompression=1)
+        self.pdf.setTitle(TITLE)
+        self.page = 1
+        self.pending: List[List[str]] = []
+
+        self.pdf.setFont('Helvetica-Bold', 14)
+        self.pdf.drawString(230, PAGE_TOP, TITLE)
+        self.y_position = PAGE_TOP - 30
+        self._draw_header()
+
+    def add_row(self, cells: List[str]) -> None:
+        """
+        Queue a row, drawing the current page and starting a new one when it is full.
+
+        :param cells: The text of every column.
+        """
+        if self.y_position - ROW_HEIGHT * len(self.pending) < PAGE_BOTTOM:
+            self._flush()
+            self._new_page()
+        self.pending.append(cells)
+
+    def add_heading(self, text: str) -> None:
+        """
+        Start a new section with a heading on a new line.
+
+        :param text: The heading.
+        """
+        self._flush()
+        if self.y_position - 2 * ROW_HEIGHT < PAGE_BOTTOM:
+            self._new_page()
+        self.y_position -= 10
+        self.pdf.setFont('Helvetica-Bold', 12)
+        self.pdf.drawString(COLUMNS[0][0], self.y_position, text)
+        self.y_position -= ROW_HEIGHT
+
+    def save(self) -> None:
+        """
+        Draw the remaining rows and write the document.
+        """
+        self._flush()
+        self._draw_page_number()
+        self.pdf.save()
+
+    def _flush(self) -> None:
+        """
+        Draw the queued rows with one text object per column.
+        """
+        if not self.pending:
+            return
+
+        for index, (x_position, _) in enumerate(COLUMNS):
+            text = self.pdf.beginText(x_position, self.y_position)
+            text.setFont(FONT, FONT_SIZE)
+            text.setLeading(ROW_HEIGHT)
+            for cells in self.pending:
+                text.textLine(cells[index])
+            self.pdf.drawText(text)
+
+        self.y_position -= ROW_HEIGHT * len(self.pending)
+        self.pending = []
+
+    def _new_page(self) -> None:
+        """
+        Finish the current page and start the next one with the column headers.
+        """
+        self._draw_page_number()
+        self.pdf.showPage()
+        self.page += 1
+        self.y_position = PAGE_TOP
+        self._draw_header()
+
+    def _draw_header(self) -> None:
+        """
+        Draw the column headers at the current position.
+        """
+        self.pdf.setFont('Helvetica-Bold', FONT_SIZE)
+        for x_position, title in COLUMNS:
+            self.pdf.drawString(x_position, self.y_position, title)
+        self.y_position -= ROW_HEIGHT
+
+    def _draw_page_number(self) -> None:
+        """
+        Draw the number of the current page at its bottom.
+        """
+        self.pdf.setFont(FONT, 8)
+        self.pdf.drawRightString(562, 30, f'Page {self.page}')
+
+def fit(text: str, width: float) -> str:
+    """
+    Shorten a text so that it fits in a column.
+
+    :param text: The text.
+    :param width: The width of the column in points.
+    :return: The text, cut and ended with '...' if it is too wide.
+    """
+    text_width = stringWidth(text, FONT, FONT_SIZE)
+    if text_width <= width:
+        return text
+    # Cut proportionally first, then trim the last few characters.
+    text = text[:int(len(text) * width / text_width)]
+    while text and stringWidth(text + '...', FONT, FONT_SIZE) > width:
+        text = text[:-1]
+    return text + '...'
+
+def write_transactions_pdf(sink: IO[bytes], batches: Iterable[Sequence[ReportRow]],
+                           currency: str, display_rate: float,
+                           subtotals: bool = False) -> int:
+    """
+    Write a PDF statement of transactions.
+
+    :param sink: The file the document is written to.
+    :param batches: Batches of rows as fetched from the database.
+    :param currency: The currency the amounts are shown in.
+    :param display_rate: Rate from the ledger currency to the shown currency.
+    :param subtotals: Whether to end the statement with the total of every category,
+        followed by the income and expense totals and their difference.
+    :return: Number of pages written.
+    """
+    statement = PdfStatement(sink)
+    category_width = COLUMNS[2][0] - COLUMNS[1][0] - 10
+    description_width = COLUMNS[3][0] - COLUMNS[2][0] - 10
+    totals: Dict[str, float] = {}
+    type_totals = {'income': 0.0, 'expense': 0.0}
+
+    for rows in batches:
+        for date, category, description, amount, category_type in rows:
+            amount *= display_rate
+            statement.add_row([date, fit(category, category_width),
+                               fit(description or '', description_width),
+                               f'{amount:.2f}', currency])
+            if subtotals:
+                totals[category] = totals.get(category, 0.0) + amount
+                type_totals[category_type] = type_totals.get(category_type, 0.0) + amount
+
+    if subtotals:
+        statement.add_heading('Subtotals by category')
+        for category, total in sorted(totals.items()):
+            statement.add_row(['', fit(category, category_width), '', f'{total:.2f}', currency])
+        net = type_totals['income'] - type_totals['expense']
+        statement.add_row(['', 'Total income', '', f"{type_totals['income']:.2f}", currency])
+        statement.add_row(['', 'Total expense', '', f"{type_totals['expense']:.2f}", currency])
+        statement.add_row(['', 'Net', '', f'{net:.2f}', currency])
+
+    statement.save()
+    return statement.page
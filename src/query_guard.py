@@ -0,0 +1,70 @@
+"""
+    Per-request query budget.
+    Counts the SQL statements each request executes, so views that load related rows
+    one at a time (N+1 queries) are caught: tests fail, other runs log a warning.
+    Views whose statement count grows with their input, such as imports, are exempt.
+"""
+
+from typing import Any, Callable, TypeVar
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wrappers import Response
+
+from src import config
+
+View = TypeVar('View', bound=Callable[..., Any])
+
+class QueryLimitExceeded(RuntimeError):
+    """
+    Raised in testing when a request executes more than MAX_QUERIES_PER_REQUEST statements.
+    """
+
+def exempt_from_query_limit(view: View) -> View:
+    """
+    Exclude a view from the query budget, for views that write in batches
+    whose number grows with the size of the request.
+
+    :param view: The view function.
+    :return: The same view function, marked as exempt.
+    """
+    setattr(view, 'query_limit_exempt', True)
+    return view
+
+def _count_query(*_: Any) -> None:
+    """
+    Count a statement executed while handling a request.
+    """
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+def check_query_count(response: Response) -> Response:
+    """
+    Compare the number of statements the request executed with MAX_QUERIES_PER_REQUEST.
+
+    :param response: The response of the request.
+    :return: The unchanged response.
+    :raises QueryLimitExceeded: If the limit is exceeded while testing.
+    """
+    count = g.get('query_count', 0)
+    view = current_app.view_functions.get(request.endpoint or '')
+    if getattr(view, 'query_limit_exempt', False):
+        return response
+    if config.MAX_QUERIES_PER_REQUEST and count > config.MAX_QUERIES_PER_REQUEST:
+        message = (f'{request.method} {request.path} executed {count} queries, '
+                   f'more than MAX_QUERIES_PER_REQUEST ({config.MAX_QUERIES_PER_REQUEST}).')
+        if current_app.testing:
+            raise QueryLimitExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+def register_query_guard(app: Flask) -> None:
+    """
+    Count the statements of every request and check them once the response is ready.
+
+    :param app: The application to guard.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+    app.after_request(check_query_count)
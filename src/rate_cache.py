@@ -0,0 +1,197 @@
+"""
+    Exchange-rate cache used by the currency API helpers.
+    Keeps recently fetched rates in memory and, optionally, in a local SQLite table
+    so they survive application restarts.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+
+RateKey = Tuple[str, str]
+
+class RateCache:
+    """
+    A TTL-bound, size-bounded cache of exchange rates keyed by (from, to) currency pair.
+
+    Attributes:
+        ttl (float): Number of seconds a cached rate stays valid.
+        max_size (int): Maximum number of pairs kept in memory (least recently used are evicted).
+        path (str): Path to the SQLite file used for persistence, empty for memory only.
+    """
+    def __init__(self, ttl: float, max_size: int, path: str = '') -> None:
+        """
+        Initializes the cache and creates the persistent table if needed.
+
+        :param ttl: Number of seconds a cached rate stays valid.
+        :param max_size: Maximum number of pairs kept in memory.
+        :param path: Path to the SQLite file used for persistence, empty for memory only.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self._entries: 'OrderedDict[RateKey, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.path:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute("""CREATE TABLE IF NOT EXISTS exchange_rate (
+                    from_currency TEXT NOT NULL,
+                    to_currency TEXT NOT NULL,
+                    rate REAL NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (from_currency, to_currency)
+                )""")
+
+    def get(self, from_currency: str, to_currency: str,
+            pivot: Optional[str] = None) -> Optional[float]:
+        """
+        Look up a rate, deriving it from the inverse pair when only that one is cached.
+
+        When a pivot currency is given and both currencies are cached against it
+        (e.g. from a rate sheet), the rate is computed as a cross rate.
+
+        :param from_currency: The base currency.
+        :param to_currency: The target currency.
+        :param pivot: Optional currency both rates may be quoted against.
+        :return: The cached rate, or None on a miss.
+        """
+        with self._lock:
+            rate = self._lookup((from_currency, to_currency))
+            if rate is None:
+                inverse = self._lookup((to_currency, from_currency))
+                if inverse:
+                    rate = 1 / inverse
+            if rate is None and pivot is not None:
+                rate = self._cross(from_currency, to_currency, pivot)
+
+            if rate is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return rate
+
+    def set(self, from_currency: str, to_currency: str, rate: float) -> None:
+        """
+        Store a freshly fetched rate.
+
+        :param from_currency: The base currency.
+        :param to_currency: The target currency.
+        :param rate: The exchange rate.
+        """
+        fetched_at = time.time()
+        with self._lock:
+            self._remember((from_currency, to_currency), rate, fetched_at)
+
+        if self.path:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO exchange_rate VALUES (?, ?, ?, ?)',
+                             (from_currency, to_currency, rate, fetched_at))
+                conn.execute('DELETE FROM exchange_rate WHERE fetched_at < ?',
+                             (fetched_at - self.ttl,))
+
+    def set_many(self, from_currency: str, rates: Dict[str, float]) -> None:
+        """
+        Store a whole rate sheet quoted against one base currency.
+
+        :param from_currency: The base currency of the sheet.
+        :param rates: Mapping of target currency to exchange rate.
+        """
+        fetched_at = time.time()
+        with self._lock:
+            for to_currency, rate in rates.items():
+                self._remember((from_currency, to_currency), rate, fetched_at)
+
+        if self.path:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.executemany('INSERT OR REPLACE INTO exchange_rate VALUES (?, ?, ?, ?)',
+                                 [(from_currency, to_currency, rate, fetched_at)
+                                  for to_currency, rate in rates.items()])
+                conn.execute('DELETE FROM exchange_rate WHERE fetched_at < ?',
+                             (fetched_at - self.ttl,))
+
+    def clear(self) -> None:
+        """
+        Drop every cached rate, both in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+
+        if self.path:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute('DELETE FROM exchange_rate')
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the cache counters.
+
+        :return: A dictionary with hit, miss and eviction counts and the current size.
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'size': len(self._entries)
+            }
+
+    def _lookup(self, key: RateKey) -> Optional[float]:
+        """
+        Find a fresh entry in memory, falling back to the persistent table.
+
+        :param key: The (from, to) currency pair.
+        :return: The rate if a fresh entry exists, else None.
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            rate, fetched_at = entry
+            if now - fetched_at < self.ttl:
+                self._entries.move_to_end(key)
+                return rate
+            del self._entries[key]
+
+        if self.path:
+            with closing(sqlite3.connect(self.path)) as conn:
+                row = conn.execute("""SELECT rate, fetched_at FROM exchange_rate
+                                   WHERE from_currency = ? AND to_currency = ?""", key).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                self._remember(key, row[0], row[1])
+                return row[0]
+
+        return None
+
+    def _cross(self, from_currency: str, to_currency: str, pivot: str) -> Optional[float]:
+        """
+        Compute a cross rate from two rates quoted against the same pivot currency.
+
+        :param from_currency: The base currency.
+        :param to_currency: The target currency.
+        :param pivot: The currency both rates are quoted against.
+        :return: The cross rate, or None if either leg is missing.
+        """
+        from_leg = 1 if from_currency == pivot else self._lookup((pivot, from_currency))
+        to_leg = 1 if to_currency == pivot else self._lookup((pivot, to_currency))
+        if not from_leg or to_leg is None:
+            return None
+        return to_leg / from_leg
+
+    def _remember(self, key: RateKey, rate: float, fetched_at: float) -> None:
+        """
+        Insert an entry in memory, evicting the least recently used ones above the size limit.
+
+        :param key: The (from, to) currency pair.
+        :param rate: The exchange rate.
+        :param fetched_at: Timestamp of when the rate was fetched.
+        """
+        self._entries[key] = (rate, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
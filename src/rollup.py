@@ -0,0 +1,206 @@
+"""
+    Monthly rollup of transactions.
+    Keeps the total and number of transactions per (month, category) up to date on every
+    write, so aggregate views read a few rows per month instead of every transaction.
+"""
+
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Tuple
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src import db
+from src.models import Transaction, Category, MonthlyRollup
+
+# Amounts may drift by float rounding when they are updated incrementally.
+TOLERANCE = 0.005
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, per database dialect; other databases
+# apply each change with an UPDATE followed by an INSERT for rows that do not exist yet.
+UPSERT_INSERTS: Dict[str, Callable[..., Any]] = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+# (date or month, category ID, amount, number of transactions) of a change.
+RollupChange = Tuple[str, int, float, int]
+
+def add_to_rollup(changes: Iterable[RollupChange]) -> None:
+    """
+    Add amounts and counts to the rollup without committing; use negative values to remove.
+
+    Changes are merged per month and category and applied with one upsert per row,
+    see `UPSERT_INSERTS`.
+
+    :param changes: The changes, dates are cut to their month.
+    """
+    merged: DefaultDict[Tuple[str, int], List[float]] = defaultdict(lambda: [0.0, 0])
+    for date, category_id, amount, count in changes:
+        entry = merged[(date[:7], int(category_id))]
+        entry[0] += amount
+        entry[1] += count
+    if not merged:
+        return
+
+    rows = [{'month': month, 'category_id': category_id, 'total': total, 'count': count}
+            for (month, category_id), (total, count) in merged.items()]
+    insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        _update_then_insert(rows)
+    else:
+        statement = insert(MonthlyRollup)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[MonthlyRollup.month, MonthlyRollup.category_id],
+                set_={'total': MonthlyRollup.total + statement.excluded.total,
+                      'count': MonthlyRollup.count + statement.excluded.count}
+            ),
+            rows
+        )
+    if any(count < 0 for _, count in merged.values()):
+        db.session.execute(db.delete(MonthlyRollup).where(MonthlyRollup.count <= 0))
+
+def _update_then_insert(rows: List[Dict[str, Any]]) -> None:
+    """
+    Add rollup changes with portable SQL: an UPDATE per row, and an INSERT
+    for the rows the UPDATE did not find.
+
+    :param rows: The merged changes, one per month and category.
+    """
+    for row in rows:
+        result: Any = db.session.execute(
+            db.update(MonthlyRollup)
+            .where(MonthlyRollup.month == row['month'],
+                   MonthlyRollup.category_id == row['category_id'])
+            .values(total=MonthlyRollup.total + row['total'],
+                    count=MonthlyRollup.count + row['count'])
+        )
+        if not result.rowcount:
+            db.session.execute(db.insert(MonthlyRollup).values(**row))
+
+def add_transaction_to_rollup(transaction: Transaction, sign: int = 1) -> None:
+    """
+    Add a transaction to the rollup, or remove it with a negative sign, without committing.
+
+    :param transaction: The transaction.
+    :param sign: 1 to add the transaction, -1 to remove it.
+    """
+    add_to_rollup([(transaction.date, transaction.category_id,
+                    sign * transaction.amount, sign)])
+
+def scale_rollup(exchange_rate: float) -> None:
+    """
+    Convert the rollup totals to another currency without committing.
+
+    :param exchange_rate: The exchange rate to apply.
+    """
+    db.session.execute(db.update(MonthlyRollup)
+                       .values(total=MonthlyRollup.total * exchange_rate))
+
+def delete_category_rollup(category_id: int) -> None:
+    """
+    Remove the rollup rows of a category without committing.
+
+    :param category_id: The ID of the category.
+    """
+    db.session.execute(db.delete(MonthlyRollup).where(MonthlyRollup.category_id == category_id))
+
+def rollup_totals() -> Dict[str, float]:
+    """
+    Sum the rollup per category type with one query.
+
+    :return: Mapping of category type (e.g., 'expense', 'income') to the total
+             in the ledger currency; types without transactions are missing.
+    """
+    rows = db.session.execute(
+        db.select(Category.category_type, db.func.sum(MonthlyRollup.total))
+        .join(Category, Category.id == MonthlyRollup.category_id)
+        .group_by(Category.category_type)
+    )
+    return {category_type: float(total) for category_type, total in rows}
+
+def rollup_category_total(category_id: int) -> float:
+    """
+    Sum the rollup of one category.
+
+    :param category_id: The ID of the category.
+    :return: The total in the ledger currency.
+    """
+    return db.session.scalar(
+        db.select(db.func.coalesce(db.func.sum(MonthlyRollup.total), 0.0))
+        .where(MonthlyRollup.category_id == category_id)
+    )
+
+def _transaction_rollup() -> Dict[Tuple[str, int], Tuple[float, int]]:
+    """
+    Aggregate the transaction table the way the rollup stores it.
+
+    :return: Mapping of (month, category ID) to (total, count).
+    """
+    month = db.func.substr(Transaction.date, 1, 7)
+    rows = db.session.execute(
+        db.select(month, Transaction.category_id,
+                  db.func.sum(Transaction.amount), db.func.count(Transaction.id))
+        .group_by(month, Transaction.category_id)
+    )
+    return {(row[0], row[1]): (float(row[2]), int(row[3])) for row in rows}
+
+def rebuild_rollup() -> int:
+    """
+    Recompute the whole rollup from the transactions and commit.
+
+    :return: Number of rollup rows.
+    """
+    db.session.execute(db.delete(MonthlyRollup))
+    rows = _transaction_rollup()
+    if rows:
+        db.session.execute(db.insert(MonthlyRollup), [
+            {'month': month, 'category_id': category_id, 'total': total, 'count': count}
+            for (month, category_id), (total, count) in rows.items()
+        ])
+    db.session.commit()
+    return len(rows)
+
+def check_rollup() -> List[str]:
+    """
+    Compare the rollup with the transactions.
+
+    :return: A message for every month and category that does not match.
+    """
+    expected = _transaction_rollup()
+    actual = {(row.month, row.category_id): (row.total, row.count)
+              for row in db.session.execute(db.select(MonthlyRollup)).scalars()}
+
+    problems = []
+    for key in sorted(set(expected) | set(actual)):
+        expected_total, expected_count = expected.get(key, (0.0, 0))
+        actual_total, actual_count = actual.get(key, (0.0, 0))
+        if expected_count != actual_count or abs(expected_total - actual_total) > TOLERANCE:
+            problems.append(f'{key[0]} category {key[1]}: rollup has {actual_total:.2f} '
+                            f'in {actual_count} transaction(s), expected {expected_total:.2f} '
+                            f'in {expected_count}')
+    return problems
+
+rollup_cli = AppGroup('rollup', help='Maintain the monthly rollup of transactions.')
+
+@rollup_cli.command('rebuild')
+def rebuild_command() -> None:
+    """
+    Recompute the monthly rollup from the transactions.
+    """
+    click.echo(f'Rebuilt {rebuild_rollup()} rollup row(s).')
+
+@rollup_cli.command('check')
+def check_command() -> None:
+    """
+    Report months and categories whose rollup does not match the transactions.
+    """
+    problems = check_rollup()
+    for problem in problems:
+        click.echo(problem)
+    if problems:
+        raise click.ClickException(f'{len(problems)} rollup row(s) are out of date, '
+                                   'run "flask rollup rebuild".')
+    click.echo('Rollup is consistent.')
@@ -2,17 +2,19 @@
     Defines budget-related routes for the Flask application.
 """
 
-from flask import render_template, Blueprint, request, redirect, url_for
+from flask import render_template, Blueprint, request, redirect, url_for, flash
+from requests.exceptions import RequestException
 from werkzeug.wrappers import Response
 
-from src.models import Budget, Transaction
+from src.models import Budget
 from src.utils import (
     get_categories_by_type,
     get_budget_by_category,
+    calculate_category_total,
     calculate_expense,
-    get_budgets
+    get_budgets,
+    from_display_amount
 )
-from src import config
 from .. import db
 
 budget_bp = Blueprint('budget', __name__)
@@ -26,20 +28,28 @@ def budget() -> str:
     """
     categories = get_categories_by_type('expense')
     budgets = get_budgets()
-    return render_template('budget.html', categories=categories,
-                           budgets=budgets, default_currency=config.DEFAULT_CURRENCY)
+    return render_template('budget.html', categories=categories, budgets=budgets)
 
 @budget_bp.route('/budget-set', methods=['POST'])
 def budget_set() -> Response:
     """
     Handles setting or updating a budget for a specific category.
 
+    The amount is given in the default currency and stored in the ledger currency;
+    if the exchange rate cannot be fetched nothing is saved and a flash message is displayed.
+
     :return: Redirects to the budget page after processing the request.
     """
     if request.method == 'POST':
         category_id = request.form.get('category_select')
         total_budget = request.form['total_budget'].strip()
 
+        try:
+            ledger_total = from_display_amount(float(total_budget))
+        except RequestException:
+            flash('API not working', 'danger')
+            return redirect(url_for('budget.budget'))
+
         new_budget = None
         if category_id is None:
             category_id = 0
@@ -47,15 +57,14 @@ def budget_set() -> Response:
         budget_category = get_budget_by_category(int(category_id))
         if budget_category is None:
             if category_id != 0:
-                sum_amount = sum(el[0].amount for el in db.session.execute(
-                    db.select(Transaction).filter_by(category_id=category_id)))
+                sum_amount = calculate_category_total(int(category_id))
             else:
                 sum_amount = calculate_expense()
             new_budget = Budget(category_id=int(category_id),
                                 current_budget=sum_amount,
-                                total_budget=float(total_budget))
+                                total_budget=ledger_total)
         else:
-            budget_category.total_budget = float(total_budget)
+            budget_category.total_budget = ledger_total
 
         if new_budget is not None:
             db.session.add(new_budget)
@@ -11,6 +11,7 @@ from src.utils import (
     get_category_by_id
 )
 from src.models import Category, Transaction, Budget
+from src.rollup import delete_category_rollup
 from .. import db
 
 categories_bp = Blueprint('categories', __name__)
@@ -107,6 +108,7 @@ def categories_delete() -> Response:
 
         db.session.query(Transaction).filter_by(category_id=category_id).delete()
         db.session.query(Budget).filter_by(category_id=category_id).delete()
+        delete_category_rollup(int(category_id))
         db.session.delete(category)
         db.session.commit()
         return redirect(url_for('categories.categories'))
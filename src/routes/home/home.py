@@ -4,14 +4,16 @@
 """
 
 from datetime import date
+from typing import Tuple, Union
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify, get_template_attribute
+from werkzeug.wrappers import Response
 
 from src.utils import (
-    calculate_income,
-    calculate_expense,
-    get_transactions,
-    get_categories
+    calculate_totals,
+    get_transaction_page,
+    get_categories,
+    page_size
 )
 from src.utils_api import get_currency_codes
 from src import config
@@ -32,23 +34,54 @@ def home() -> str:
     """
     Render the home page with financial data.
 
-    Fetches income, expenses, transactions and categories, then renders the home page.
+    Fetches income and expenses in total and for the current month, the first page
+    of transactions (newest first) and categories, then renders the home page.
 
     :return: The rendered home page template.
     """
-    income = calculate_income()
-    expense = calculate_expense()
-    transactions = get_transactions()
+    today = date.today()
+    totals = calculate_totals()
+    month_totals = calculate_totals(today.replace(day=1).isoformat(), today.isoformat())
+    transactions, next_cursor = get_transaction_page(limit=page_size(request.args.get('limit')),
+                                                     newest_first=True)
     categories = get_categories()
     currency_codes = get_currency_codes()
 
     return render_template(
         'home.html',
         transactions=transactions,
+        next_cursor=next_cursor,
         categories=categories,
-        income=income,
-        expense=expense,
-        date=date.today(),
+        income=totals['income'],
+        expense=totals['expense'],
+        month_income=month_totals['income'],
+        month_expense=month_totals['expense'],
+        date=today,
         default_currency=config.DEFAULT_CURRENCY,
-        currency_codes=currency_codes
+        currency_codes=currency_codes,
+        import_job=request.args.get('import_job')
     )
+
+@home_bp.route('/home-transactions', methods=['GET'])
+def home_transactions() -> Union[Response, Tuple[Response, int]]:
+    """
+    Return the next page of the home page transactions for "load more".
+
+    :return: JSON with the rendered table rows and the cursor of the following page,
+             or an error with status 400 for an invalid cursor.
+    """
+    try:
+        transactions, next_cursor = get_transaction_page(
+            cursor=request.args.get('cursor'),
+            limit=page_size(request.args.get('limit')),
+            newest_first=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    home_rows = get_template_attribute('macros.html', 'home_rows')
+    return jsonify({
+        'html': str(home_rows(transactions, get_categories(), config.DEFAULT_CURRENCY,
+                              get_currency_codes())),
+        'next_cursor': next_cursor
+    })
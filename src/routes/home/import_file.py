@@ -1,61 +1,123 @@
 """
-    Handles importing transactions from CSV files.
+    Handles importing transactions from CSV and Parquet files and ZIP archives of them.
     Validates file format, processes transactions and updates budgets.
 """
 
-import pandas as pd
-from flask import Blueprint, request, redirect, url_for, flash
+import os
+from typing import Tuple, Union
+
+from flask import Blueprint, request, redirect, url_for, flash, jsonify, current_app
 from werkzeug.wrappers import Response
 from werkzeug.datastructures import FileStorage
 
-from src import db
-from src.utils import get_budget_by_category, add_budget_expense
-from .validators import validate_file, validate_columns, process_transaction
+from src import db, config
+from src.query_guard import exempt_from_query_limit
+from .import_jobs import import_jobs, run_import, spool_uploads
+from .import_pipeline import ImportReport
+from .validators import validate_file
 
 import_bp = Blueprint('import_export', __name__)
 
+def flash_report(report: ImportReport, streaming: bool) -> None:
+    """
+    Flash the outcome of an import together with the first invalid rows.
+
+    :param report: The import report.
+    :param streaming: Whether valid rows were imported despite invalid ones.
+    """
+    if report.rows_rejected and not streaming:
+        flash(f'{report.rows_rejected} invalid row(s), nothing was imported.', 'danger')
+    else:
+        message = f'Imported {report.rows_imported} row(s)'
+        if report.rows_rejected:
+            message += f', skipped {report.rows_rejected} invalid row(s)'
+        if report.rows_skipped:
+            message += f', skipped {report.rows_skipped} already imported row(s)'
+        if report.resumed_from:
+            message += f', resumed after row {report.resumed_from}'
+        flash(f'{message}.', 'warning' if report.rows_rejected else 'success')
+
+    for error in report.errors:
+        flash(error, 'danger')
+    if report.rows_rejected > len(report.errors):
+        flash(f'... and {report.rows_rejected - len(report.errors)} more invalid row(s).',
+              'danger')
+
 @import_bp.route('/home-import', methods=['POST'])
+@exempt_from_query_limit
 def home_import() -> Response:
     """
-    Handle CSV file import for transactions.
+    Handle CSV and Parquet file import for transactions.
 
-    Validates the uploaded CSV file, processes transactions and updates budget records.
+    Accepts one or more CSV or Parquet files or ZIP archives of them, validates them,
+    processes transactions and updates budget records. With background imports enabled
+    the files are spooled and imported by a worker thread, and the home page polls the
+    job status. In streaming mode files are imported chunk by chunk and invalid rows are
+    skipped, otherwise nothing is imported if any row is invalid.
 
     :return: A redirect to the home page.
     """
     if request.method == 'POST':
-        file = request.files.get('csv_file')
-        if not isinstance(file, FileStorage):
+        files = request.files.getlist('csv_file')
+        if not files or not all(isinstance(file, FileStorage) for file in files):
             flash('Invalid file upload!', 'danger')
             return redirect(url_for('home.home'))
 
-        if not validate_file(file):
+        if not all(validate_file(file) for file in files):
             return redirect(url_for('home.home'))
 
-        with file.stream as f:
+        streaming = request.form.get('stream') is not None
+        if config.IMPORT_BACKGROUND:
+            app = current_app._get_current_object()  # pylint: disable=protected-access
             try:
-                df = pd.read_csv(f)
-            except pd.errors.EmptyDataError:
-                flash('CSV file is empty!', 'danger')
+                job = import_jobs.submit(app, files, streaming)
+            except OSError as e:
+                flash(f'Could not store the upload: {e.strerror or e}', 'danger')
                 return redirect(url_for('home.home'))
+            flash(f'Import of {", ".join(file.filename or "" for file in files)} started.', 'info')
+            return redirect(url_for('home.home', import_job=job.id))
 
-        if not validate_columns(df):
+        try:
+            sources = spool_uploads(files)
+        except OSError as e:
+            flash(f'Could not store the upload: {e.strerror or e}', 'danger')
             return redirect(url_for('home.home'))
+        try:
+            report = run_import(sources, streaming)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return redirect(url_for('home.home'))
+        finally:
+            for _, path in sources:
+                os.remove(path)
 
-        transactions = []
-        for index, (_, row) in enumerate(df.iterrows()):
-            transaction = process_transaction(row.to_dict(), index)
-            if transaction is None:
-                return redirect(url_for('home.home'))
-            budget_category = get_budget_by_category(transaction.category_id)
-            add_budget_expense(budget_category, transaction.amount)
+        flash_report(report, streaming)
 
-            budget_all = get_budget_by_category(0)
-            add_budget_expense(budget_all, transaction.amount)
+    return redirect(url_for('home.home'))
 
-            transactions.append(transaction)
+@import_bp.route('/home-import/<job_id>', methods=['GET'])
+def home_import_status(job_id: str) -> Union[Response, Tuple[Response, int]]:
+    """
+    Report the progress of a background import.
 
-        db.session.add_all(transactions)
-        db.session.commit()
+    :param job_id: The ID of the import job.
+    :return: JSON response with the job status and counters.
+    """
+    job = import_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found.'}), 404
+    return jsonify(job.to_dict())
 
-    return redirect(url_for('home.home'))
+@import_bp.route('/home-import/<job_id>/cancel', methods=['POST'])
+def home_import_cancel(job_id: str) -> Union[Response, Tuple[Response, int]]:
+    """
+    Cancel a background import at its next chunk boundary.
+
+    :param job_id: The ID of the import job.
+    :return: JSON response with the job status and counters.
+    """
+    job = import_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found.'}), 404
+    return jsonify(job.to_dict())
@@ -0,0 +1,234 @@
+"""
+    Background import jobs.
+    Uploads are spooled to disk and imported by a pool of worker threads,
+    while the browser polls the job status.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+from src import db, config
+from .import_pipeline import (
+    ImportCancelled,
+    ImportReport,
+    Source,
+    import_all_or_nothing,
+    import_batch,
+    import_streaming,
+    source_format
+)
+
+MAX_KEPT_JOBS = 100
+
+class ImportJob:
+    """
+    A CSV import running in the background.
+
+    Attributes:
+        id (str): The unique identifier for the job.
+        sources (list[tuple[str, str]]): Names and paths of the spooled uploads.
+        streaming (bool): Whether the file is imported in streaming mode.
+        status (str): One of 'queued', 'running', 'completed', 'failed' or 'cancelled'.
+        error (str): Error message of a failed job.
+        report (ImportReport): Counters and error report of the import.
+        started_at (float): Timestamp of when the import started running.
+        finished_at (float): Timestamp of when the import finished.
+    """
+    def __init__(self, sources: List[Source], streaming: bool) -> None:
+        """
+        Initializes a queued job.
+
+        :param sources: Names and paths of the spooled uploads.
+        :param streaming: Whether the files are imported in streaming mode.
+        """
+        self.id = uuid.uuid4().hex
+        self.sources = sources
+        self.streaming = streaming
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.report = ImportReport()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the job progress for the status endpoint.
+
+        :return: A JSON-serializable dictionary.
+        """
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        return {
+            'id': self.id,
+            'files': [name for name, _ in self.sources],
+            'streaming': self.streaming,
+            'status': self.status,
+            'error': self.error,
+            'rows_processed': self.report.rows_processed,
+            'rows_imported': self.report.rows_imported,
+            'rows_rejected': self.report.rows_rejected,
+            'rows_skipped': self.report.rows_skipped,
+            'resumed_from': self.report.resumed_from,
+            'errors': self.report.errors,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round(self.report.rows_processed / elapsed, 1) if elapsed else 0.0
+        }
+
+
+class ImportJobManager:
+    """
+    Runs import jobs on a bounded pool of worker threads and keeps their status.
+    """
+    def __init__(self, workers: int) -> None:
+        """
+        Initializes the manager.
+
+        :param workers: Maximum number of imports running at the same time.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='import-job')
+        self._jobs: 'OrderedDict[str, ImportJob]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, app: Flask, files: List[FileStorage], streaming: bool) -> ImportJob:
+        """
+        Spool uploads to disk and queue their import.
+
+        :param app: The application the import runs in.
+        :param files: The uploaded CSV, Parquet or ZIP files.
+        :param streaming: Whether the files are imported in streaming mode.
+        :return: The queued job.
+        :raises OSError: If an upload cannot be spooled, nothing is left in the spool then.
+        """
+        job = ImportJob(spool_uploads(files), streaming)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_KEPT_JOBS:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ('queued', 'running'):
+                    break
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._run, app, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """
+        Find a job by its ID.
+
+        :param job_id: The ID of the job.
+        :return: The job if found, else None.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ImportJob]:
+        """
+        Request cancellation of a job; it stops at the next chunk boundary.
+
+        :param job_id: The ID of the job.
+        :return: The job if found, else None.
+        """
+        job = self.get(job_id)
+        if job is not None and job.status in ('queued', 'running'):
+            job.report.cancel_requested = True
+        return job
+
+    @staticmethod
+    def _run(app: Flask, job: ImportJob) -> None:
+        """
+        Import a spooled upload inside an application context and remove the file afterwards.
+
+        :param app: The application the import runs in.
+        :param job: The job to run.
+        """
+        job.started_at = time.time()
+        job.status = 'running'
+        with app.app_context():
+            try:
+                job.report.check_cancelled()
+                run_import(job.sources, job.streaming, job.report)
+                job.status = 'completed'
+            except ImportCancelled:
+                db.session.rollback()
+                job.status = 'cancelled'
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                db.session.rollback()
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                for _, path in job.sources:
+                    os.remove(path)
+
+def spool_upload(file: FileStorage) -> str:
+    """
+    Save an upload to the spool directory.
+
+    :param file: The uploaded file.
+    :return: The path of the spooled file.
+    :raises OSError: If the file cannot be saved, a partly written file is removed.
+    """
+    spool_dir = config.IMPORT_SPOOL_DIR or tempfile.gettempdir()
+    os.makedirs(spool_dir, exist_ok=True)
+    suffix = os.path.splitext(file.filename or '')[1]
+    fd, path = tempfile.mkstemp(prefix='import-', suffix=suffix, dir=spool_dir)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            file.save(fp)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def spool_uploads(files: List[FileStorage]) -> List[Source]:
+    """
+    Save several uploads to the spool directory.
+
+    :param files: The uploaded files.
+    :return: Names and paths of the spooled uploads.
+    :raises OSError: If an upload cannot be saved, the uploads spooled so far are removed.
+    """
+    sources: List[Source] = []
+    try:
+        for file in files:
+            sources.append((file.filename or '', spool_upload(file)))
+    except BaseException:
+        for _, path in sources:
+            os.remove(path)
+        raise
+    return sources
+
+def run_import(sources: List[Source], streaming: bool,
+               report: Optional[ImportReport] = None) -> ImportReport:
+    """
+    Import spooled uploads: a single CSV or Parquet file directly,
+    several files or ZIP archives as a batch.
+
+    :param sources: Names and paths of the spooled uploads.
+    :param streaming: Whether the files are imported in streaming mode.
+    :param report: Report to update while importing, a new one is created if omitted.
+    :return: The import report.
+    :raises ValueError: If a single file is empty, invalid or was already imported.
+    :raises ImportCancelled: If the import was cancelled.
+    """
+    if len(sources) == 1 and not sources[0][0].lower().endswith('.zip'):
+        file_format = source_format(sources[0][0])
+        with open(sources[0][1], 'rb') as fp:
+            if streaming:
+                return import_streaming(fp, report, file_format)
+            return import_all_or_nothing(fp, report, file_format)
+    return import_batch(sources, streaming, report)
+
+import_jobs = ImportJobManager(config.IMPORT_WORKERS)
@@ -0,0 +1,554 @@
+"""
+    Import pipeline for CSV and Parquet files.
+    Reads uploads in chunks, validates them column by column, skips rows that
+    were imported before and writes transactions together with the matching budget updates.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import IO, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src import db, config
+from src.models import Transaction, ImportCheckpoint
+from src.parquet_io import PARQUET_AVAILABLE, read_parquet_chunks
+from src.rollup import RollupChange, add_to_rollup
+from src.utils import (
+    add_budget_expenses,
+    get_category_index,
+    get_existing_fingerprints,
+    transaction_fingerprint
+)
+from src.utils_api import get_currency_code_set
+from .validators import REQUIRED_COLUMNS, column_error, validate_frame, convert_frame_amounts
+
+MAX_REPORTED_ERRORS = 10
+
+# (file name, path) of an uploaded or extracted file.
+Source = Tuple[str, str]
+# File hash, validated chunks, error messages, number of rows and file-level error.
+ParsedSource = Tuple[str, List[pd.DataFrame], List[str], int, Optional[str]]
+
+class ImportCancelled(Exception):
+    """
+    Raised between chunks when an import was cancelled.
+    """
+
+
+class ImportReport:
+    """
+    Counters and error report of one import run.
+
+    Attributes:
+        rows_processed (int): Number of data rows read so far.
+        rows_imported (int): Number of rows written to the database.
+        rows_rejected (int): Number of invalid rows.
+        rows_skipped (int): Number of valid rows skipped because they were imported before.
+        resumed_from (int): Number of rows skipped because a previous run committed them.
+        errors (list[str]): The first error messages, one per invalid row.
+        cancel_requested (bool): Set to stop the import at the next chunk boundary.
+    """
+    def __init__(self) -> None:
+        """
+        Initializes an empty report.
+        """
+        self.rows_processed = 0
+        self.rows_imported = 0
+        self.rows_rejected = 0
+        self.rows_skipped = 0
+        self.resumed_from = 0
+        self.errors: List[str] = []
+        self.cancel_requested = False
+
+    def check_cancelled(self) -> None:
+        """
+        Stop the import if it was cancelled.
+
+        :raises ImportCancelled: If cancellation was requested.
+        """
+        if self.cancel_requested:
+            raise ImportCancelled()
+
+    def reject(self, errors: List[str]) -> None:
+        """
+        Count invalid rows, keeping only the first messages.
+
+        :param errors: Error messages, one per invalid row.
+        """
+        self.rows_rejected += len(errors)
+        self.errors.extend(errors[:MAX_REPORTED_ERRORS - len(self.errors)])
+
+def file_hash(stream: IO[bytes]) -> str:
+    """
+    Compute the SHA-256 of an uploaded file and rewind it.
+
+    :param stream: The uploaded file.
+    :return: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(1 << 20), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def source_format(name: str) -> str:
+    """
+    Tell the format of an uploaded file from its name.
+
+    :param name: The file name.
+    :return: 'parquet' for Parquet files, 'csv' otherwise.
+    """
+    return 'parquet' if name.lower().endswith('.parquet') else 'csv'
+
+def read_chunks(stream: IO[bytes], chunk_size: int,
+                file_format: str = 'csv') -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or Parquet file in chunks, checking the columns of the first one.
+
+    :param stream: The uploaded file.
+    :param chunk_size: Number of rows per chunk.
+    :param file_format: 'csv' or 'parquet'.
+    :return: An iterator over the chunks.
+    :raises ValueError: If the file is empty, unreadable or lacks the required columns.
+    """
+    if file_format == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise ValueError('Parquet import requires the pyarrow package.')
+        reader = read_parquet_chunks(stream, REQUIRED_COLUMNS, chunk_size)
+        first = next(reader, None)
+        if first is None:
+            raise ValueError('Parquet file is empty!')
+    else:
+        try:
+            reader = pd.read_csv(stream, chunksize=chunk_size)
+            first = next(reader, None)
+        except pd.errors.EmptyDataError as exc:
+            raise ValueError('CSV file is empty!') from exc
+
+    error = column_error(first if first is not None else pd.DataFrame())
+    if error is not None:
+        raise ValueError(error)
+
+    yield first
+    yield from reader
+
+def prepare_chunk(chunk: pd.DataFrame, categories: Dict[str, int], start: int,
+                  seen: Counter) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Validate and fingerprint a chunk.
+
+    :param chunk: Rows read from the uploaded file.
+    :param categories: Mapping of normalized category name to category ID.
+    :param start: Number of data rows before this chunk, used for row numbers.
+    :param seen: Occurrences of each row so far in the file, updated in place.
+    :return: The valid rows and the error messages of the invalid ones.
+    """
+    frame, errors = validate_frame(chunk, categories, get_currency_code_set(),
+                                   config.DEFAULT_CURRENCY, start)
+    frame['fingerprint'] = fingerprint_frame(frame, seen)
+    return frame, errors
+
+def fingerprint_frame(frame: pd.DataFrame, seen: Counter) -> List[str]:
+    """
+    Compute the fingerprints of validated rows.
+
+    Identical rows of one file are numbered, so a file with two equal purchases
+    imports both of them, while importing it again skips both.
+
+    :param frame: Validated rows.
+    :param seen: Occurrences of each row so far in the file, updated in place.
+    :return: The fingerprint of every row.
+    """
+    fingerprints = []
+    for key in zip(frame['date'], frame['category_id'], frame['description'],
+                   frame['original_amount'], frame['original_currency']):
+        fingerprints.append(transaction_fingerprint(*key, occurrence=seen[key]))
+        seen[key] += 1
+    return fingerprints
+
+def skip_existing(frame: pd.DataFrame, report: ImportReport,
+                  pending: Optional[Set[str]] = None) -> pd.DataFrame:
+    """
+    Drop rows whose fingerprint is already stored, with one lookup per chunk.
+
+    :param frame: Validated and fingerprinted rows.
+    :param report: Report counting the skipped rows.
+    :param pending: Fingerprints queued for writing earlier in the same import,
+                    updated in place with the ones kept.
+    :return: The rows that were not imported before.
+    """
+    if frame.empty:
+        return frame
+
+    existing = get_existing_fingerprints(frame['fingerprint'])
+    if pending is not None:
+        existing |= pending & set(frame['fingerprint'])
+    if existing:
+        duplicate = frame['fingerprint'].isin(existing)
+        report.rows_skipped += int(duplicate.sum())
+        frame = frame[~duplicate].copy()
+    if pending is not None:
+        pending.update(frame['fingerprint'])
+    return frame
+
+def write_frame(frame: pd.DataFrame, expense_ids: Set[int]) -> None:
+    """
+    Insert validated rows and apply their budget and rollup updates, without committing.
+
+    :param frame: Validated rows with amounts in the ledger currency.
+    :param expense_ids: IDs of the expense categories.
+    """
+    if frame.empty:
+        return
+
+    db.session.execute(db.insert(Transaction), frame.to_dict('records'))
+    add_budget_expenses(budget_totals(frame, expense_ids))
+    add_to_rollup(rollup_changes(frame))
+
+def rollup_changes(frame: pd.DataFrame) -> List[RollupChange]:
+    """
+    Sum and count imported rows per month and category.
+
+    :param frame: Validated rows with amounts in the ledger currency.
+    :return: The changes to add to the monthly rollup.
+    """
+    grouped = frame.groupby([frame['date'].str[:7], 'category_id'])['amount'].agg(['sum', 'count'])
+    return [(month, int(category_id), float(total), int(count))
+            for (month, category_id), total, count
+            in zip(grouped.index, grouped['sum'], grouped['count'])]
+
+def budget_totals(frame: pd.DataFrame, expense_ids: Set[int]) -> Dict[int, float]:
+    """
+    Sum imported amounts per category and, for expenses only, for the overall budget.
+
+    :param frame: Validated rows with amounts in the ledger currency.
+    :param expense_ids: IDs of the expense categories.
+    :return: Mapping of category ID (0 for the overall budget) to the amount to add.
+    """
+    totals = {int(category_id): float(amount)
+              for category_id, amount in frame.groupby('category_id')['amount'].sum().items()}
+    expense_total = sum(amount for category_id, amount in totals.items()
+                        if category_id in expense_ids)
+    if expense_total:
+        totals[0] = totals.get(0, 0.0) + expense_total
+    return totals
+
+def import_all_or_nothing(stream: IO[bytes], report: Optional[ImportReport] = None,
+                          file_format: str = 'csv') -> ImportReport:
+    """
+    Import a file in one database transaction, writing nothing if any row is invalid.
+
+    :param stream: The uploaded file.
+    :param report: Report to update while importing, a new one is created if omitted.
+    :param file_format: 'csv' or 'parquet'.
+    :return: The import report.
+    :raises ValueError: If the file is empty or lacks the required columns.
+    :raises ImportCancelled: If the import was cancelled, nothing is written then.
+    """
+    report = report or ImportReport()
+    category_index = get_category_index()
+    categories = category_index.name_ids
+    expense_ids = category_index.ids_of_type('expense')
+
+    frames = []
+    seen: Counter = Counter()
+    for chunk in read_chunks(stream, config.IMPORT_CHUNK_SIZE, file_format):
+        report.check_cancelled()
+        frame, errors = prepare_chunk(chunk, categories, report.rows_processed, seen)
+        report.rows_processed += len(chunk)
+        report.reject(errors)
+        frames.append(skip_existing(frame, report))
+
+    if report.rows_rejected:
+        return report
+
+    for frame in frames:
+        frame['amount'] = convert_frame_amounts(frame)
+        write_frame(frame, expense_ids)
+    report.check_cancelled()
+    db.session.commit()
+    report.rows_imported = sum(len(frame) for frame in frames)
+    return report
+
+def import_streaming(stream: IO[bytes], report: Optional[ImportReport] = None,
+                     file_format: str = 'csv') -> ImportReport:
+    """
+    Import a file chunk by chunk in constant memory.
+
+    Each chunk is committed together with the checkpoint of the file, invalid rows are
+    skipped and reported. Uploading the same file again resumes after the last committed chunk.
+    The checkpoint of a new file is only created once its first chunk was read, so files
+    that are empty or lack columns leave nothing behind.
+
+    :param stream: The uploaded file.
+    :param report: Report to update while importing, a new one is created if omitted.
+    :param file_format: 'csv' or 'parquet'.
+    :return: The import report.
+    :raises ValueError: If the file is empty, lacks the required columns
+                        or was already imported completely.
+    :raises ImportCancelled: If the import was cancelled, committed chunks are kept then.
+    """
+    report = report or ImportReport()
+    digest = file_hash(stream)
+    checkpoint = db.session.execute(
+        db.select(ImportCheckpoint).filter_by(file_hash=digest)
+    ).scalar_one_or_none()
+    if checkpoint is not None and checkpoint.completed:
+        raise ValueError('This file was already imported.')
+
+    report.resumed_from = checkpoint.rows_done if checkpoint is not None else 0
+    category_index = get_category_index()
+    categories = category_index.name_ids
+    expense_ids = category_index.ids_of_type('expense')
+
+    seen: Counter = Counter()
+    for chunk in read_chunks(stream, config.IMPORT_CHUNK_SIZE, file_format):
+        report.check_cancelled()
+        if checkpoint is None:
+            # Committed together with the rows of the first chunk.
+            checkpoint = ImportCheckpoint(file_hash=digest, rows_done=0, completed=False)
+            db.session.add(checkpoint)
+        start = report.rows_processed
+        report.rows_processed += len(chunk)
+        done = min(max(checkpoint.rows_done - start, 0), len(chunk))
+        if done:
+            # Committed by a previous run, only counted to number repeated rows.
+            prepare_chunk(chunk.iloc[:done], categories, start, seen)
+        if done == len(chunk):
+            continue
+
+        chunk = chunk.iloc[done:]
+        frame, errors = prepare_chunk(chunk, categories, start + done, seen)
+        report.reject(errors)
+
+        frame = skip_existing(frame, report)
+        frame['amount'] = convert_frame_amounts(frame)
+        write_frame(frame, expense_ids)
+        checkpoint.rows_done = report.rows_processed
+        db.session.commit()
+        report.rows_imported += len(frame)
+
+    if checkpoint is not None:
+        checkpoint.completed = True
+        db.session.commit()
+    return report
+
+def expand_sources(sources: List[Source], spool_dir: str) -> Tuple[List[Source], List[str]]:
+    """
+    Replace ZIP archives by the CSV and Parquet files they contain.
+
+    Archives with more than IMPORT_MAX_ARCHIVE_FILES files, or whose files take more than
+    IMPORT_MAX_ARCHIVE_MB once extracted, are refused before anything is extracted.
+
+    :param sources: Uploaded files.
+    :param spool_dir: Directory the archive members are extracted to.
+    :return: The files to import and the paths of the extracted files.
+    :raises ValueError: If an archive is corrupt, too large or cannot be extracted;
+                        files extracted so far are removed.
+    """
+    expanded: List[Source] = []
+    extracted: List[str] = []
+    try:
+        for name, path in sources:
+            if not name.lower().endswith('.zip'):
+                expanded.append((name, path))
+                continue
+
+            with zipfile.ZipFile(path) as archive:
+                members = [member for member in archive.infolist()
+                           if not member.is_dir() and os.path.splitext(member.filename)[1].lower()
+                           in ('.csv', '.parquet')]
+                check_archive_size(name, members)
+                for member in members:
+                    suffix = os.path.splitext(member.filename)[1].lower()
+                    fd, member_path = tempfile.mkstemp(prefix='import-', suffix=suffix,
+                                                       dir=spool_dir)
+                    extracted.append(member_path)
+                    with os.fdopen(fd, 'wb') as target, archive.open(member) as source:
+                        shutil.copyfileobj(source, target)
+                    expanded.append((f'{name}/{member.filename}', member_path))
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        for member_path in extracted:
+            os.remove(member_path)
+        if isinstance(e, zipfile.BadZipFile):
+            raise ValueError(f'{name}: not a valid ZIP archive.') from e
+        if isinstance(e, OSError):
+            raise ValueError(f'{name}: the archive could not be extracted.') from e
+        raise
+    return expanded, extracted
+
+def check_archive_size(name: str, members: List[zipfile.ZipInfo]) -> None:
+    """
+    Check the number and uncompressed size of the files of an archive against the limits.
+
+    :param name: Name of the archive.
+    :param members: The CSV and Parquet files of the archive.
+    :raises ValueError: If the archive exceeds IMPORT_MAX_ARCHIVE_FILES or IMPORT_MAX_ARCHIVE_MB.
+    """
+    if len(members) > config.IMPORT_MAX_ARCHIVE_FILES:
+        raise ValueError(f'{name}: contains {len(members)} files, '
+                         f'at most {config.IMPORT_MAX_ARCHIVE_FILES} are allowed.')
+    total_size = sum(member.file_size for member in members)
+    if total_size > config.IMPORT_MAX_ARCHIVE_MB * 1024 * 1024:
+        raise ValueError(f'{name}: extracts to {total_size / (1024 * 1024):.1f} MB, '
+                         f'at most {config.IMPORT_MAX_ARCHIVE_MB} MB are allowed.')
+
+def parse_source(source: Source, categories: Dict[str, int], currency_codes: FrozenSet[str],
+                 default_currency: str, chunk_size: int) -> ParsedSource:
+    """
+    Parse, validate and fingerprint one file; runs in a worker process
+    and does not touch the database.
+
+    :param source: The file name and path.
+    :param categories: Mapping of normalized category name to category ID.
+    :param currency_codes: The supported currency codes.
+    :param default_currency: The currency used for unsupported currency codes.
+    :param chunk_size: Number of rows per chunk.
+    :return: The file hash, validated chunks, error messages, number of rows
+             and a file-level error message.
+    """
+    name, path = source
+    frames: List[pd.DataFrame] = []
+    errors: List[str] = []
+    rows = 0
+    seen: Counter = Counter()
+    with open(path, 'rb') as fp:
+        digest = file_hash(fp)
+        try:
+            for chunk in read_chunks(fp, chunk_size, source_format(name)):
+                frame, chunk_errors = validate_frame(chunk, categories, currency_codes,
+                                                     default_currency, rows)
+                frame['fingerprint'] = fingerprint_frame(frame, seen)
+                rows += len(chunk)
+                frames.append(frame)
+                errors.extend(f'{name}: {error}' for error in chunk_errors)
+        except ValueError as e:
+            return digest, [], [], rows, f'{name}: {e}'
+    return digest, frames, errors, rows, None
+
+def parser_context() -> multiprocessing.context.BaseContext:
+    """
+    Get the multiprocessing context of the parser processes.
+
+    Batch imports run in a worker thread next to request threads and other workers, and
+    a child forked from this process could inherit a lock one of them held at fork time.
+    Where available the parsers are forked from a separate single-threaded server process
+    that has this module imported already, otherwise they are spawned.
+
+    :return: The multiprocessing context.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+def import_batch(sources: List[Source], streaming: bool,
+                 report: Optional[ImportReport] = None) -> ImportReport:
+    """
+    Import several files, or ZIP archives of files, at once.
+
+    Files are parsed and validated in parallel by a process pool, while this thread
+    is the only one writing to the database. In streaming mode every file is committed
+    on its own, files imported before are skipped and invalid rows are skipped; otherwise
+    nothing is written if any file or row is invalid.
+
+    :param sources: Uploaded files.
+    :param streaming: Whether files are committed one by one, skipping invalid rows.
+    :param report: Report to update while importing, a new one is created if omitted.
+    :return: The import report.
+    :raises ImportCancelled: If the import was cancelled.
+    """
+    report = report or ImportReport()
+    category_index = get_category_index()
+    expense_ids = category_index.ids_of_type('expense')
+
+    spool_dir = config.IMPORT_SPOOL_DIR or tempfile.gettempdir()
+    sources, extracted = expand_sources(sources, spool_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=config.IMPORT_PROCESSES or None,
+                                 mp_context=parser_context()) as pool:
+            parsed = pool.map(partial(parse_source,
+                                      categories=category_index.name_ids,
+                                      currency_codes=get_currency_code_set(),
+                                      default_currency=config.DEFAULT_CURRENCY,
+                                      chunk_size=config.IMPORT_CHUNK_SIZE),
+                              sources)
+
+            pending = []
+            queued: Set[str] = set()
+            try:
+                for (name, _), (digest, frames, errors, rows, file_error) in zip(sources, parsed):
+                    report.check_cancelled()
+                    report.rows_processed += rows
+                    report.reject([file_error] if file_error else errors)
+                    if streaming:
+                        if file_error is None:
+                            _write_source(name, digest, frames, rows, expense_ids, report)
+                    elif not report.rows_rejected:
+                        pending.extend(skip_existing(frame, report, queued) for frame in frames)
+            except BaseException:
+                # Drop the queued files, otherwise leaving the pool waits until all are parsed.
+                pool.shutdown(cancel_futures=True)
+                raise
+
+        if not streaming and not report.rows_rejected:
+            for frame in pending:
+                frame['amount'] = convert_frame_amounts(frame)
+                write_frame(frame, expense_ids)
+            report.check_cancelled()
+            db.session.commit()
+            report.rows_imported = sum(len(frame) for frame in pending)
+    finally:
+        for path in extracted:
+            os.remove(path)
+
+    return report
+
+def _write_source(name: str, digest: str, frames: List[pd.DataFrame], rows: int,
+                  expense_ids: Set[int], report: ImportReport) -> None:
+    """
+    Write the validated rows of one file and mark it as imported, in one transaction.
+
+    Files that were imported completely before are skipped and their rows counted as
+    already imported; files whose streaming import was interrupted are rejected,
+    since only a single-file import can resume them.
+
+    :param name: Name of the file.
+    :param digest: SHA-256 of the file.
+    :param frames: Validated chunks of the file.
+    :param rows: Number of data rows in the file, valid or not.
+    :param expense_ids: IDs of the expense categories.
+    :param report: Report to update.
+    """
+    checkpoint = db.session.execute(
+        db.select(ImportCheckpoint).filter_by(file_hash=digest)
+    ).scalar_one_or_none()
+    if checkpoint is not None and checkpoint.completed:
+        report.rows_skipped += sum(len(frame) for frame in frames)
+        return
+    if checkpoint is not None and checkpoint.rows_done:
+        report.reject([f'{name}: partially imported before, upload it on its own to resume'])
+        return
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(file_hash=digest)
+        db.session.add(checkpoint)
+
+    imported = 0
+    for frame in frames:
+        frame = skip_existing(frame, report)
+        frame['amount'] = convert_frame_amounts(frame)
+        write_frame(frame, expense_ids)
+        imported += len(frame)
+    checkpoint.rows_done = rows
+    checkpoint.completed = True
+    db.session.commit()
+    report.rows_imported += imported
@@ -12,10 +12,12 @@ from src.utils import (
     update_budget_expense,
     delete_budget_expense,
     get_transaction_by_id,
-    get_category_by_id
+    get_category_index,
+    transaction_fingerprint
 )
 from src import db
-from .validators import is_valid, validate_currency
+from src.rollup import add_transaction_to_rollup
+from .validators import is_valid, is_valid_date, normalize_currency, validate_currency
 
 transactions_bp = Blueprint('transactions', __name__)
 
@@ -36,23 +38,26 @@ def home_transaction() -> Response:
         transaction_description = request.form['transaction_description'].strip()
         transaction_currency = request.form['transaction_currency'].strip()
 
-        if not is_valid(transaction_category, transaction_amount):
+        if (not is_valid(transaction_category, transaction_amount)
+                or not is_valid_date(transaction_date)):
             return redirect(url_for('home.home'))
 
+        transaction_currency = normalize_currency(transaction_currency)
         transaction_amount_num = validate_currency(transaction_currency, float(transaction_amount))
 
         budget_category = get_budget_by_category(int(transaction_category))
         add_budget_expense(budget_category, transaction_amount_num)
 
-        category = get_category_by_id(int(transaction_category))
-        if category is not None and category.category_type == 'expense':
+        if get_category_index().get_type(int(transaction_category)) == 'expense':
             budget_all = get_budget_by_category(0)
             add_budget_expense(budget_all, transaction_amount_num)
 
         create_transaction(int(transaction_category),
                             transaction_description,
                             transaction_amount_num,
-                            transaction_date)
+                            transaction_date,
+                            float(transaction_amount),
+                            transaction_currency)
 
         return redirect(url_for('home.home'))
 
@@ -82,7 +87,10 @@ def home_update() -> Response:
         if not transaction or not is_valid(updated_category, updated_amount):
             flash('Transaction not found.', 'error')
             return redirect(url_for('home.home'))
+        if not is_valid_date(updated_date):
+            return redirect(url_for('home.home'))
 
+        updated_currency = normalize_currency(updated_currency)
         updated_amount_float = validate_currency(updated_currency, float(updated_amount))
 
         current_budget_category = get_budget_by_category(transaction.category_id)
@@ -94,10 +102,18 @@ def home_update() -> Response:
             budget_all = get_budget_by_category(0)
             update_budget_expense(budget_all, transaction.amount, updated_amount_float)
 
+        add_transaction_to_rollup(transaction, -1)
         transaction.category_id = int(updated_category)
         transaction.description = updated_description
         transaction.amount = updated_amount_float
+        transaction.original_amount = float(updated_amount)
+        transaction.original_currency = updated_currency
         transaction.date = updated_date
+        transaction.fingerprint = transaction_fingerprint(updated_date, int(updated_category),
+                                                          updated_description,
+                                                          float(updated_amount),
+                                                          updated_currency)
+        add_transaction_to_rollup(transaction)
 
         db.session.commit()
         return redirect(url_for('home.home'))
@@ -131,6 +147,7 @@ def home_delete() -> Response:
             budget_all = get_budget_by_category(0)
             delete_budget_expense(transaction, budget_all)
 
+        add_transaction_to_rollup(transaction, -1)
         db.session.delete(transaction)
         db.session.commit()
 
@@ -3,16 +3,17 @@
 """
 
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 import pandas as pd
 from flask import flash
 from werkzeug.datastructures import FileStorage
 
-from src.models import Transaction
 from src import config
-from src.utils import get_category_by_name
-from src.utils_api import get_currency_codes, get_exchange_rate
+from src.parquet_io import PARQUET_AVAILABLE
+from src.utils_api import get_currency_code_set, get_exchange_rate
+
+REQUIRED_COLUMNS = {'date', 'category', 'description', 'amount', 'currency'}
 
 def is_valid(transaction_category: Optional[str], transaction_amount: str) -> bool:
     """
@@ -30,158 +31,195 @@ def is_valid(transaction_category: Optional[str], transaction_amount: str) -> bo
         return False
     return True
 
+def is_valid_date(transaction_date: str) -> bool:
+    """
+    Validates if a transaction date is a real date in YYYY-MM-DD format.
+
+    :param transaction_date: The date of the transaction.
+    :return: True if valid, False otherwise.
+    """
+    try:
+        datetime.strptime(transaction_date, '%Y-%m-%d')
+    except ValueError:
+        flash(f'Invalid date \'{transaction_date}\'! Expected format: YYYY-MM-DD', 'danger')
+        return False
+    return True
+
 def validate_file(file: FileStorage) -> bool:
     """
     Validates the uploaded file.
 
     :param file: The uploaded file.
-    :return: True if the file is a valid CSV, False otherwise.
+    :return: True if the file is a CSV or Parquet file or a ZIP archive, False otherwise.
     """
     if not file or file.filename == '':
         flash('No file selected!', 'danger')
         return False
-    if not file.filename.endswith('.csv'):
-        flash('Invalid file format! Please upload a CSV file.', 'danger')
+    if not file.filename.lower().endswith(('.csv', '.parquet', '.zip')):
+        flash('Invalid file format! Please upload CSV or Parquet files or a ZIP archive.',
+              'danger')
+        return False
+    if file.filename.lower().endswith('.parquet') and not PARQUET_AVAILABLE:
+        flash('Parquet import requires the pyarrow package.', 'danger')
         return False
     return True
 
-def validate_columns(df: pd.DataFrame) -> bool:
+def column_error(df: pd.DataFrame) -> Optional[str]:
     """
-    Validates if the CSV file contains the required columns.
+    Checks that the CSV file has data and contains the required columns.
 
     :param df: The dataframe loaded from the CSV file.
-    :return: True if valid, False otherwise.
+    :return: An error message if the columns are invalid, None otherwise.
     """
     if df.empty:
-        flash('CSV file is empty!', 'danger')
-        return False
-    required_columns = {'date', 'category', 'description', 'amount', 'currency'}
-    if not required_columns.issubset(df.columns):
-        flash(f'Invalid CSV format! Expected columns: {", ".join(required_columns)}', 'danger')
-        return False
-    return True
-
-def extract_and_validate_category(row: Dict[str, Optional[str]], index: int) -> str:
-    """
-    Extracts and validates the category field from a row.
+        return 'CSV file is empty!'
+    if not REQUIRED_COLUMNS.issubset(df.columns):
+        return f'Invalid CSV format! Expected columns: {", ".join(REQUIRED_COLUMNS)}'
+    return None
 
-    :param row: The row of data.
-    :param index: The index of the row.
-    :return: The validated category name.
-    :raises ValueError: If the category is missing or invalid.
-    """
-    category_name = row.get('category')
-    if pd.isna(category_name) or category_name is None or category_name.strip() == '':
-        raise ValueError(f'Invalid or missing category on row {index+1}')
-    return category_name.strip()
-
-def extract_and_validate_description(row: Dict[str, Optional[str]]) -> str:
+def validate_columns(df: pd.DataFrame) -> bool:
     """
-    Extracts and validates the description field from a row.
+    Validates if the CSV file contains the required columns.
 
-    :param row: The row of data.
-    :return: The validated description.
+    :param df: The dataframe loaded from the CSV file.
+    :return: True if valid, False otherwise.
     """
-    description = row.get('description')
-    return '' if pd.isna(description) or description is None else str(description).strip()
+    error = column_error(df)
+    if error is not None:
+        flash(error, 'danger')
+        return False
+    return True
 
-def extract_and_validate_amount(row: Dict[str, Optional[str]], index: int) -> float:
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
     """
-    Extracts and validates the amount field from a row.
+    Returns a column as stripped strings with missing and blank values as NA.
 
-    :param row: The row of data.
-    :param index: The index of the row.
-    :return: The validated amount as a float.
-    :raises ValueError: If the amount is missing, not a number, or non-positive.
+    :param df: The dataframe loaded from the CSV file.
+    :param column: The column name.
+    :return: The cleaned column.
     """
-    amount_str = row.get('amount')
-    if pd.isna(amount_str) or amount_str is None or amount_str == '':
-        raise ValueError(f'Invalid amount on row {index+1}')
-    try:
-        amount = float(amount_str)
-        if amount <= 0:
-            raise ValueError(f'Invalid amount \'{amount}\' on row {index+1}')
-    except ValueError as exc:
-        raise ValueError(f'Amount \'{amount_str}\' is not a valid number on row {index+1}') from exc
+    values = df[column].astype('string').str.strip()
+    return values.mask(values == '')
 
-    return amount
-
-def extract_and_validate_date(row: Dict[str, Optional[str]], index: int) -> datetime:
+def _normalized_names(names: pd.Series) -> pd.Series:
     """
-    Extracts and validates the date field from a row.
+    Normalizes category names the same way as `normalize_category_name`.
 
-    :param row: The row of data.
-    :param index: The index of the row.
-    :return: The validated date as a datetime object.
-    :raises ValueError: If the date format is incorrect.
+    :param names: Stripped category names.
+    :return: The names with collapsed whitespace, ignoring case.
     """
-    date_str = row.get('date')
-    if pd.isna(date_str) or date_str is None or date_str.strip() == '':
-        raise ValueError(f'Invalid or missing date on row {index+1}')
-    date_str = date_str.strip()
-    try:
-        return datetime.strptime(date_str, '%Y-%m-%d')
-    except ValueError as exc:
-        raise ValueError(f"""Invalid date \'{date_str}\'!
-                          Expected format: YYYY-MM-DD on row {index+1}""") from exc
+    return names.str.replace(r'\s+', ' ', regex=True).str.casefold()
 
-def extract_and_validate_currency(row: Dict[str, Optional[str]], index: int) -> str:
+def validate_frame(df: pd.DataFrame,
+                   categories: Dict[str, int],
+                   currency_codes: FrozenSet[str],
+                   default_currency: str,
+                   start: int = 0) -> Tuple[pd.DataFrame, List[str]]:
     """
-    Extracts and validates the currency field from a row.
+    Validates transactions column by column instead of row by row.
 
-    :param row: The row of data.
-    :param index: The index of the row.
-    :return: The validated currency code.
-    :raises ValueError: If the currency is missing.
-    """
-    currency = row.get('currency')
-    if pd.isna(currency) or currency is None or currency.strip() == '':
-        raise ValueError(f'Invalid or missing currency on row {index+1}')
-    return currency.strip()
+    Every bad row is reported, with all of its problems, instead of stopping at the first one.
+    Unsupported currency codes are treated as the default currency.
 
-def process_transaction(row: Dict[str, Optional[str]], index: int) -> Optional[Transaction]:
-    """
-    Processes a transaction from a row of data.
+    :param df: The dataframe loaded from the CSV file.
+    :param categories: Mapping of normalized category name to category ID,
+                       see `CategoryIndex.name_ids`.
+    :param currency_codes: The supported currency codes.
+    :param default_currency: The currency used for unsupported currency codes.
+    :param start: Number of data rows before this dataframe, used for row numbers.
+    :return: The valid rows (category_id, description, original_amount, original_currency, date)
+             and a list of error messages, one per invalid row.
+    """
+    category_name = _text_column(df, 'category')
+    category_id = _normalized_names(category_name).map(categories)
+
+    amount_raw = df['amount']
+    if pd.api.types.is_numeric_dtype(amount_raw):
+        amount = amount_raw.astype(float)
+        amount_missing = amount_raw.isna()
+    else:
+        amount = pd.to_numeric(amount_raw, errors='coerce')
+        amount_missing = amount_raw.isna() | (amount_raw.astype('string').str.strip() == '')
+
+    # Typed columns (e.g. from Parquet files) skip the text parsing.
+    if pd.api.types.is_datetime64_any_dtype(df['date']):
+        date_str = df['date']
+        date = df['date']
+    else:
+        date_str = _text_column(df, 'date')
+        date = pd.to_datetime(date_str, format='%Y-%m-%d', errors='coerce')
+
+    currency = _text_column(df, 'currency')
+
+    checks = [
+        (category_name.isna(), lambda i: 'Invalid or missing category'),
+        (category_name.notna() & category_id.isna(),
+         lambda i: f'Non-existing category "{category_name[i]}"'),
+        (amount_missing, lambda i: 'Invalid amount'),
+        (~amount_missing & amount.isna(),
+         lambda i: f'Amount \'{amount_raw[i]}\' is not a valid number'),
+        (amount <= 0, lambda i: f'Invalid amount \'{amount[i]}\''),
+        (date_str.isna(), lambda i: 'Invalid or missing date'),
+        (date_str.notna() & date.isna(),
+         lambda i: f'Invalid date \'{date_str[i]}\'! Expected format: YYYY-MM-DD'),
+        (currency.isna(), lambda i: 'Invalid or missing currency')
+    ]
+
+    invalid = pd.concat([mask.fillna(False).astype(bool) for mask, _ in checks], axis=1)
+    invalid_rows = invalid.any(axis=1)
+
+    errors = []
+    for position in invalid_rows.to_numpy().nonzero()[0]:
+        index = df.index[position]
+        messages = [message(index) for (_, message), failed
+                    in zip(checks, invalid.iloc[position]) if failed]
+        errors.append(f'Row {start + position + 1}: {"; ".join(messages)}')
+
+    valid = ~invalid_rows
+    frame = pd.DataFrame({
+        'category_id': category_id[valid].astype(int),
+        'description': _text_column(df, 'description')[valid].fillna(''),
+        'original_amount': amount[valid].astype(float),
+        'original_currency': currency[valid].where(currency[valid].isin(currency_codes),
+                                                   default_currency),
+        'date': date[valid].dt.strftime('%Y-%m-%d')
+    })
+    return frame, errors
+
+def convert_frame_amounts(frame: pd.DataFrame) -> pd.Series:
+    """
+    Converts the original amounts of validated rows to the ledger currency.
+
+    One exchange rate is looked up per distinct currency, not per row.
+
+    :param frame: Validated rows as returned by `validate_frame`.
+    :return: The amounts in the ledger currency.
+    """
+    rates = {currency: get_exchange_rate(currency, config.LEDGER_CURRENCY)
+             for currency in frame['original_currency'].unique()}
+    return frame['original_amount'] * frame['original_currency'].map(rates).astype(float)
+
+def normalize_currency(currency: str) -> str:
+    """
+    Maps unsupported currency codes to the default currency.
 
-    :param row: The row of data.
-    :param index: The index of the row.
-    :return: A Transaction object if valid, None otherwise.
+    :param currency: The currency code of the transaction.
+    :return: The currency code the amount is treated as.
     """
-    try:
-        category_name = extract_and_validate_category(row, index)
-        description = extract_and_validate_description(row)
-        amount = extract_and_validate_amount(row, index)
-        date_obj = extract_and_validate_date(row, index)
-        currency = extract_and_validate_currency(row, index)
-
-        category = get_category_by_name(category_name)
-        if not category:
-            raise ValueError(f'Non-existing category "{category_name}" on row {index+1}')
-
-        amount = validate_currency(currency, amount)
-
-        return Transaction(
-            category_id=category.id,
-            description=description,
-            amount=amount,
-            date=date_obj.strftime('%Y-%m-%d')
-        )
-    except ValueError as e:
-        flash(str(e), 'danger')
-        return None
+    return currency if currency in get_currency_code_set() else config.DEFAULT_CURRENCY
 
 def validate_currency(currency: str, amount: float) -> float:
     """
-    Validates and converts an amount to the default currency if needed.
+    Validates and converts an amount to the ledger currency if needed.
+
+    Unsupported currency codes are treated as the default currency.
 
     :param currency: The currency code of the transaction.
     :param amount: The transaction amount.
-    :return: The converted amount in the default currency.
+    :return: The converted amount in the ledger currency.
     """
-    currency_codes = get_currency_codes()
-    if currency not in currency_codes:
-        currency = 'BGN'
-    elif currency != config.DEFAULT_CURRENCY:
-        exchange_rate = get_exchange_rate(currency, config.DEFAULT_CURRENCY)
+    currency = normalize_currency(currency)
+    if currency != config.LEDGER_CURRENCY:
+        exchange_rate = get_exchange_rate(currency, config.LEDGER_CURRENCY)
         amount *= exchange_rate
     return amount
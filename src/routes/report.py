@@ -4,197 +4,393 @@
 
 import csv
 import io
-from typing import Dict, List, Optional, Union
-
-import matplotlib.pyplot as plt
-from matplotlib.cm import get_cmap
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from flask import render_template, Blueprint, request, redirect, url_for, Response, flash
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from flask import (
+    render_template,
+    Blueprint,
+    request,
+    redirect,
+    url_for,
+    Response,
+    flash,
+    jsonify,
+    get_template_attribute,
+    send_file,
+    stream_with_context
+)
 from werkzeug.wrappers import Response as WerkzeugResponse
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import ColumnElement, Row, Select
 
-from src import config
+from src import db, config
+from src.chart_cache import ChartCache
+from src.charts import ChartBusyError, ChartRenderer, ChartTimeoutError, render_pie_chart
+from src.ledger_version import current_ledger_version
 from src.utils import (
     get_categories,
-    get_transactions,
-    get_transactions_by_type
+    get_category_index,
+    get_display_currency,
+    get_display_rate,
+    get_transaction_page,
+    page_size
 )
-from src.models import Transaction
+from src.models import Transaction, Category
+from src.parquet_io import PARQUET_AVAILABLE, write_ledger_parquet
+from src.pdf_report import write_transactions_pdf
 
 report_bp = Blueprint('report', __name__)
 
-def filter_by_category(filter_type: str, arguments: Dict[str, Optional[str]]) -> List[Transaction]:
-    """
-    Filters transactions based on the given criteria.
-
-    :param filter_type: Type of filtering ('date', 'amount', 'category').
-    :param arguments: Dictionary containing filter values.
-    :return: List of filtered transactions.
-    """
-    transactions = get_transactions()
-    filtered_transactions = []
-
-    if filter_type == 'date':
-        from_date = arguments.get('from_date')
-        to_date = arguments.get('to_date')
-        if from_date is not None and to_date is not None:
-            filtered_transactions = [transaction for transaction in transactions
-                                     if from_date <= transaction.date <= to_date]
-
-    elif filter_type == 'amount':
-        filter_amount = arguments.get('filter_amount')
-        if filter_amount is not None:
-            try:
-                filter_amount_num = float(filter_amount)
-                filtered_transactions = [ transaction for transaction in transactions
-                                       if float(f'{transaction.amount:.2f}') == filter_amount_num]
-            except ValueError:
-                flash('Invalid amount', 'danger')
-
-    elif filter_type == 'category':
-        filter_category = arguments.get('filter_category')
-        if filter_category is not None:
-            try:
-                filter_category_int = int(filter_category)
-                filtered_transactions = [transaction for transaction in transactions
-                                         if transaction.category_id == filter_category_int]
-            except ValueError:
-                pass
-
-    return filtered_transactions
+chart_cache = ChartCache(config.CHART_CACHE_SIZE)
+chart_renderer = ChartRenderer(config.CHART_RENDER_WORKERS, config.CHART_RENDER_QUEUE,
+                               config.CHART_RENDER_TIMEOUT)
+
+# Request arguments that make up a report filter.
+FILTER_KEYS = ('from_date', 'to_date', 'filter_category', 'min_amount', 'max_amount',
+               'filter_amount')
+
+def build_filters(arguments: Dict[str, Optional[str]]) -> List[ColumnElement[bool]]:
+    """
+    Translates the report filters into SQL conditions that can be combined.
+
+    Dates and amounts become range predicates, so they can use the indexes on
+    `transaction.date` and `transaction.amount`. Amounts are entered in the default
+    currency and compared in the ledger currency.
+
+    :param arguments: Dictionary containing filter values (from_date, to_date, filter_category,
+                      min_amount, max_amount and filter_amount for an exact amount).
+    :return: List of conditions, empty if no filter is set.
+    """
+    conditions: List[ColumnElement[bool]] = []
+
+    from_date = arguments.get('from_date')
+    to_date = arguments.get('to_date')
+    if from_date:
+        conditions.append(Transaction.date >= from_date)
+    if to_date:
+        conditions.append(Transaction.date <= to_date)
+
+    filter_category = arguments.get('filter_category')
+    if filter_category:
+        try:
+            conditions.append(Transaction.category_id == int(filter_category))
+        except ValueError:
+            pass
+
+    try:
+        min_amount = _amount_argument(arguments.get('min_amount'))
+        max_amount = _amount_argument(arguments.get('max_amount'))
+        exact_amount = _amount_argument(arguments.get('filter_amount'))
+    except ValueError:
+        flash('Invalid amount', 'danger')
+        return conditions
+
+    display_rate = get_display_rate()
+    if exact_amount is not None:
+        # Amounts that are displayed as exact_amount once rounded to cents.
+        conditions.append(Transaction.amount >= (exact_amount - 0.005) / display_rate)
+        conditions.append(Transaction.amount < (exact_amount + 0.005) / display_rate)
+    if min_amount is not None:
+        conditions.append(Transaction.amount >= min_amount / display_rate)
+    if max_amount is not None:
+        conditions.append(Transaction.amount <= max_amount / display_rate)
+
+    return conditions
+
+def _amount_argument(value: Optional[str]) -> Optional[float]:
+    """
+    Parses an optional amount filter.
+
+    :param value: The submitted value.
+    :return: The amount, or None if it was left empty.
+    :raises ValueError: If the value is not a number.
+    """
+    if value is None or value.strip() == '':
+        return None
+    return float(value)
+
+def filter_query(arguments: Dict[str, Optional[str]]) -> Optional[Select]:
+    """
+    Builds the query for the transactions that match all of the given filters.
+
+    :param arguments: Dictionary containing filter values, see `build_filters`.
+    :return: The query ordered by date, or None if no filter is set.
+    """
+    conditions = build_filters(arguments)
+    if not conditions:
+        return None
+    return db.select(Transaction).where(*conditions).order_by(Transaction.date, Transaction.id)
+
+def filter_transactions(arguments: Dict[str, Optional[str]],
+                        cursor: Optional[str] = None) -> Tuple[List[Transaction], Optional[str]]:
+    """
+    Fetches one page of the transactions that match all of the given filters.
+
+    :param arguments: Dictionary containing filter values, see `build_filters`,
+                      and optionally `limit` for the page size.
+    :param cursor: The cursor of the previous page, None for the first page.
+    :return: The filtered transactions ordered by date, empty if no filter is set,
+             and the cursor of the next page or None if this is the last page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    statement = filter_query(arguments)
+    if statement is None:
+        return [], None
+    return get_transaction_page(statement, cursor, page_size(arguments.get('limit')))
 
 @report_bp.route('/report', methods=['GET'])
 def report() -> str:
     """
-    Renders the report page with transaction filters.
+    Renders the report page with the transactions matching all submitted filters.
 
     :return: Rendered report template.
     """
     categories = get_categories()
-    filter_type = request.args.get('filter_type')
 
     # Convert request.args (MultiDict) to a dictionary with Optional[str] values
     arguments: Dict[str, Optional[str]] = {key: request.args.get(key) for key in request.args}
-    filtered_transactions = filter_by_category(filter_type, arguments)
+    filtered_transactions, next_cursor = filter_transactions(arguments)
     return render_template('report.html',
                            categories=categories,
                            filtered_transactions=filtered_transactions,
-                           default_currency=config.DEFAULT_CURRENCY)
+                           next_cursor=next_cursor,
+                           filter_token=dump_filter_token(arguments))
 
-def generate_csv(transactions: List[Transaction]) -> Response:
+@report_bp.route('/report-transactions', methods=['GET'])
+def report_transactions() -> Union[Response, Tuple[Response, int]]:
     """
-    Generates a CSV file from transactions.
+    Returns the next page of the filtered report transactions for "load more".
 
-    :param transactions: List of transaction objects.
-    :return: Flask response containing the CSV file.
+    :return: JSON with the rendered table rows and the cursor of the following page,
+             or an error with status 400 for an invalid cursor.
     """
-    output = io.StringIO()
-    writer = csv.writer(output)
+    arguments: Dict[str, Optional[str]] = {key: request.args.get(key) for key in request.args}
+    try:
+        transactions, next_cursor = filter_transactions(arguments, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    writer.writerow(['date', 'category', 'description', 'amount', 'currency'])
+    report_rows = get_template_attribute('macros.html', 'report_rows')
+    return jsonify({
+        'html': str(report_rows(transactions)),
+        'next_cursor': next_cursor
+    })
 
-    for transaction in transactions:
-        writer.writerow([transaction.date, transaction.category.name, transaction.description,
-                         f'{transaction.amount:.2f}', config.DEFAULT_CURRENCY])
+def generate_csv(statement: Optional[Select]) -> Response:
+    """
+    Streams a CSV file of the transactions returned by a query.
 
-    response = Response(output.getvalue(), mimetype='text/csv')
+    Rows are fetched `EXPORT_BATCH_SIZE` at a time together with their category name and sent
+    as soon as each batch is written, so memory use does not grow with the export size.
+
+    :param statement: The transaction query, None for an empty report.
+    :return: Flask response streaming the CSV file.
+    """
+    response = Response(stream_with_context(iter_csv(statement)), mimetype='text/csv')
     response.headers['Content-Disposition'] = 'attachment; filename=report.csv'
 
     return response
 
-def generate_pdf(transactions: List[Transaction]) -> Response:
+def iter_export_rows(statement: Optional[Select]) -> Iterator[Sequence[Row]]:
+    """
+    Fetches the exported columns of a transaction query in batches of `EXPORT_BATCH_SIZE`.
+
+    The category name is joined into the same query and only the exported columns are
+    fetched, so no ORM objects are built for the rows.
+
+    :param statement: The transaction query, None for an empty report.
+    :return: An iterator over batches of (date, category, description, amount, category type) rows.
+    """
+    if statement is None:
+        return
+
+    result = db.session.execute(
+        statement.join(Transaction.category)
+        .with_only_columns(Transaction.date, Category.name, Transaction.description,
+                           Transaction.amount, Category.category_type)
+        .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+    )
+    yield from result.partitions()
+
+def iter_csv(statement: Optional[Select]) -> Iterator[str]:
+    """
+    Yields a CSV file of transactions, one block of rows per database batch.
+
+    :param statement: The transaction query, None for an empty report.
+    :return: An iterator over the CSV text.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    display_rate = get_display_rate()
+    display_currency = get_display_currency()
+
+    writer.writerow(['date', 'category', 'description', 'amount', 'currency'])
+    yield output.getvalue()
+
+    for rows in iter_export_rows(statement):
+        output.seek(0)
+        output.truncate()
+        writer.writerows([date, category, description,
+                          f'{amount * display_rate:.2f}', display_currency]
+                         for date, category, description, amount, _ in rows)
+        yield output.getvalue()
+
+def generate_pdf(statement: Optional[Select], subtotals: bool = False) -> WerkzeugResponse:
     """
-    Generates a PDF report of transactions.
+    Generates a PDF report of the transactions returned by a query.
 
-    :param transactions: List of transaction objects.
+    Rows are fetched in batches and the document is spooled to a temporary file,
+    which is then streamed to the client. Only the response is streamed: the pages
+    are kept in memory until the document is written, see `src.pdf_report`.
+
+    :param statement: The transaction query, None for an empty report.
+    :param subtotals: Whether to end the report with the total of every category.
     :return: Flask response containing the PDF file.
     """
-    output = io.BytesIO()
-    pdf = canvas.Canvas(output, pagesize=letter)
-    pdf.setTitle('Transaction Report')
-
-    y_position = 750
-    pdf.setFont('Helvetica-Bold', 14)
-    pdf.drawString(230, y_position, 'Transaction Report')
-    y_position -= 30
-
-    pdf.setFont('Helvetica-Bold', 10)
-    pdf.drawString(50, y_position, 'Date')
-    pdf.drawString(130, y_position, 'Category')
-    pdf.drawString(250, y_position, 'Description')
-    pdf.drawString(400, y_position, 'Amount')
-    pdf.drawString(500, y_position, 'Currency')
-    y_position -= 20
-
-    pdf.setFont('Helvetica', 10)
-    for transaction in transactions:
-        if y_position < 50:
-            pdf.showPage()
-            y_position = 750
-
-        pdf.drawString(50, y_position, str(transaction.date))
-        pdf.drawString(130, y_position, transaction.category.name)
-        pdf.drawString(250, y_position, str(transaction.description))
-        pdf.drawString(400, y_position, f'{transaction.amount:.2f}')
-        pdf.drawString(500, y_position, config.DEFAULT_CURRENCY)
-        y_position -= 20
-
-    pdf.save()
+    output = tempfile.TemporaryFile()
+    write_transactions_pdf(output, iter_export_rows(statement), get_display_currency(),
+                           get_display_rate(), subtotals)
     output.seek(0)
+    return send_file(output, mimetype='application/pdf',
+                     as_attachment=True, download_name='report.pdf')
 
-    response = Response(output.getvalue(), mimetype='application/pdf')
-    response.headers['Content-Disposition'] = 'attachment; filename=report.pdf'
-    return response
-
-def generate_pie_chart(filtered_transactions: List[Transaction]) -> Response:
+def category_totals(statement: Optional[Select], category_type: str) -> List[Tuple[str, float]]:
     """
-    Generates a pie chart for filtered transactions.
+    Sums the amounts of the transactions returned by a query per category, in SQL.
 
-    :param filtered_transactions: List of transactions for the chart.
-    :return: Flask response containing the pie chart image.
+    :param statement: The transaction query, None for an empty report.
+    :param category_type: The category type to include ('income' or 'expense').
+    :return: List of (category name, total in the ledger currency) ordered by name.
     """
-    category_totals: Dict[str, float] = {}
+    return category_totals_by_type(statement).get(category_type, [])
 
-    for transaction in filtered_transactions:
-        category_name = transaction.category.name
-        if category_name in category_totals:
-            category_totals[category_name] += transaction.amount
-        else:
-            category_totals[category_name] = transaction.amount
+def category_totals_by_type(statement: Optional[Select]) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Sums the amounts of the transactions returned by a query per category, in one query.
 
-    labels = list(category_totals.keys())
-    sizes = list(category_totals.values())
-    colors = get_cmap('Paired')(range(len(labels))).tolist()
+    The sum is grouped by `category_id` alone, so SQLite answers it from the covering
+    index on (date, category_id, amount); names and types come from the category index.
 
-    plt.clf()
-    plt.figure(figsize=(6, 6))
-    plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%')
+    :param statement: The transaction query, None for an empty report.
+    :return: Mapping of category type to a list of (category name, total in the ledger
+             currency) ordered by name.
+    """
+    if statement is None:
+        return {}
+
+    category_index = get_category_index()
+    rows = db.session.execute(
+        statement.with_only_columns(Transaction.category_id, db.func.sum(Transaction.amount))
+        .group_by(Transaction.category_id)
+        .order_by(None)
+    )
+    totals: Dict[str, List[Tuple[str, float]]] = {}
+    for category_id, total in rows:
+        totals.setdefault(category_index.get_type(category_id) or '', []).append(
+            (category_index.names[category_id], float(total)))
+    return {category_type: sorted(items) for category_type, items in totals.items()}
+
+def monthly_totals(statement: Optional[Select]) -> List[Dict[str, Union[str, float]]]:
+    """
+    Sums the income and expense of the transactions returned by a query per month, in SQL.
 
-    output = io.BytesIO()
-    plt.savefig(output, format='png')
-    plt.close()
-    output.seek(0)
+    :param statement: The transaction query, None for an empty report.
+    :return: List of {'month': 'YYYY-MM', 'income': total, 'expense': total} ordered by month,
+             with totals in the ledger currency.
+    """
+    if statement is None:
+        return []
+
+    category_index = get_category_index()
+    month = db.func.substr(Transaction.date, 1, 7)
+    rows = db.session.execute(
+        statement.with_only_columns(month, Transaction.category_id,
+                                    db.func.sum(Transaction.amount))
+        .group_by(month, Transaction.category_id)
+        .order_by(None)
+    )
+    months: Dict[str, Dict[str, float]] = {}
+    for current_month, category_id, total in rows:
+        series = months.setdefault(current_month, {'income': 0.0, 'expense': 0.0})
+        category_type = category_index.get_type(category_id)
+        if category_type in series:
+            series[category_type] += float(total)
+    return [{'month': current_month, **series} for current_month, series in sorted(months.items())]
+
+def generate_pie_chart(chart_type: str,
+                       totals: List[Tuple[str, float]]) -> Union[WerkzeugResponse, Response]:
+    """
+    Returns a pie chart of category totals, rendering it only if it is not cached.
 
-    response = Response(output.getvalue(), content_type='image/png')
+    :param chart_type: The kind of chart, part of the cache key.
+    :param totals: List of (category name, total) to draw.
+    :return: Flask response containing the pie chart image, or a redirect to the report
+             page if the render pool is busy or the chart took too long.
+    """
+    key = chart_cache.key(chart_type, totals)
+    version = current_ledger_version()
+    image = chart_cache.get(key, version)
+    if image is None:
+        try:
+            image = chart_renderer.render(render_pie_chart, totals)
+        except (ChartBusyError, ChartTimeoutError):
+            flash('Charts are busy right now, please try again.', 'danger')
+            return redirect(url_for('report.report'))
+        chart_cache.set(key, version, image)
+
+    response = Response(image, content_type='image/png')
     response.headers['Content-Disposition'] = 'attachment; filename=pie_chart.png'
 
     return response
 
-def get_filtered_transactions(filtered_transaction_ids_str: str) -> List[Transaction]:
+def dump_filter_token(arguments: Dict[str, Optional[str]]) -> str:
     """
-    Retrieves transactions based on a list of transaction IDs.
+    Encodes the submitted report filters into a short signed token.
+
+    The export and chart forms post the token instead of the filtered transaction IDs,
+    so their size does not depend on the number of matching transactions.
 
-    :param filtered_transaction_ids_str: Comma-separated string of transaction IDs.
-    :return: List of filtered transaction objects.
+    :param arguments: Dictionary containing filter values, see `build_filters`.
+    :return: The URL-safe token.
+    """
+    filters = {key: arguments[key] for key in FILTER_KEYS if arguments.get(key)}
+    return _filter_serializer().dumps(filters)
+
+def load_filter_token(token: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Decodes the report filters from a token created by `dump_filter_token`.
+
+    :param token: The submitted token.
+    :return: The filter values, or None if the token is invalid or expired.
     """
     try:
-        filtered_transaction_ids = [int(id) for id in filtered_transaction_ids_str.split(',')]
-    except ValueError:
-        filtered_transaction_ids = []
+        filters = _filter_serializer().loads(token, max_age=config.REPORT_TOKEN_MAX_AGE)
+    except BadSignature:
+        return None
+    if not isinstance(filters, dict):
+        return None
+    return {key: filters.get(key) for key in FILTER_KEYS}
+
+def _filter_serializer() -> URLSafeTimedSerializer:
+    """
+    Creates the serializer that signs report filter tokens with the secret key.
+
+    :return: The serializer.
+    """
+    return URLSafeTimedSerializer(config.SECRET_KEY, salt='report-filter')
+
+def get_token_arguments(token: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Decodes the report filters of a submitted form, flashing a message if they expired.
 
-    transactions = get_transactions()
-    return [transaction for transaction in transactions
-            if transaction.id in filtered_transaction_ids]
+    :param token: The submitted token.
+    :return: The filter values, or None if the token is invalid or expired.
+    """
+    arguments = load_filter_token(token)
+    if arguments is None:
+        flash('The report has expired, please apply the filter again.', 'danger')
+    return arguments
 
 @report_bp.route('/report-table', methods=['POST'])
 def report_table() -> Union[WerkzeugResponse, str]:
@@ -204,19 +400,93 @@ def report_table() -> Union[WerkzeugResponse, str]:
     :return: Flask response with the exported file.
     """
     if request.method == 'POST':
-        filtered_transaction_ids_str = request.form['filtered_transaction_ids'].strip()
-        filtered_transactions = get_filtered_transactions(filtered_transaction_ids_str)
+        arguments = get_token_arguments(request.form['filter_token'].strip())
+        if arguments is None:
+            return redirect(url_for('report.report'))
         export_type = request.form['export_type'].strip()
 
         if export_type == 'pdf':
-            return generate_pdf(filtered_transactions)
+            subtotals = request.form.get('subtotals') is not None
+            return generate_pdf(filter_query(arguments), subtotals)
         if export_type == 'csv':
-            return generate_csv(filtered_transactions)
+            return generate_csv(filter_query(arguments))
 
         return redirect(url_for('report.report'))
 
     return redirect(url_for('report.report'))
 
+@report_bp.route('/report-ledger', methods=['GET'])
+def report_ledger() -> WerkzeugResponse:
+    """
+    Exports the whole transaction ledger as a Parquet file for analysis tools.
+
+    The file is written batch by batch from the database cursor to a temporary file,
+    so the ledger is never held in memory at once.
+
+    :return: Flask response with the Parquet file.
+    """
+    if not PARQUET_AVAILABLE:
+        flash('Parquet export requires the pyarrow package.', 'danger')
+        return redirect(url_for('report.report'))
+
+    output = tempfile.TemporaryFile()
+    write_ledger_parquet(output, config.LEDGER_CURRENCY, config.EXPORT_BATCH_SIZE)
+    output.seek(0)
+    return send_file(output, mimetype='application/vnd.apache.parquet',
+                     as_attachment=True, download_name='ledger.parquet')
+
+def chart_data_etag(arguments: Dict[str, Optional[str]]) -> str:
+    """
+    Builds the ETag of the chart data for a filter.
+
+    It only changes with the ledger version, the filter, the currencies and the display rate
+    (which converts both the totals and the amount filters), so an unchanged chart can be
+    answered with 304 Not Modified after reading the ledger version, a single-row SELECT.
+
+    :param arguments: Dictionary containing filter values, see `build_filters`.
+    :return: The ETag value.
+    """
+    filters = {key: arguments[key] for key in FILTER_KEYS if arguments.get(key)}
+    return ChartCache.key('chart-data', [current_ledger_version(), config.LEDGER_CURRENCY,
+                                         get_display_currency(), round(get_display_rate(), 8),
+                                         filters])
+
+@report_bp.route('/report-chart-data', methods=['GET'])
+def report_chart_data() -> WerkzeugResponse:
+    """
+    Returns the aggregated chart series of the filtered transactions as JSON,
+    for rendering charts in the browser.
+
+    Totals are in the default currency: per category for expense and income,
+    and per month for both.
+
+    :return: JSON response with an ETag, or 304 Not Modified if the client has it already.
+    """
+    arguments: Dict[str, Optional[str]] = {key: request.args.get(key) for key in request.args}
+    etag = chart_data_etag(arguments)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        statement = filter_query(arguments)
+        display_rate = get_display_rate()
+        totals = category_totals_by_type(statement)
+        response = jsonify({
+            'currency': get_display_currency(),
+            'categories': {
+                category_type: [{'name': name, 'total': round(total * display_rate, 2)}
+                                for name, total in totals.get(category_type, [])]
+                for category_type in ('expense', 'income')
+            },
+            'monthly': [{'month': series['month'],
+                         'income': round(float(series['income']) * display_rate, 2),
+                         'expense': round(float(series['expense']) * display_rate, 2)}
+                        for series in monthly_totals(statement)]
+        })
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @report_bp.route('/report-chart', methods=['POST'])
 def report_chart() -> Union[WerkzeugResponse, str]:
     """
@@ -225,16 +495,17 @@ def report_chart() -> Union[WerkzeugResponse, str]:
     :return: Flask response with the chart image.
     """
     if request.method == 'POST':
-        filtered_transaction_ids_str = request.form['filtered_transaction_ids']
-        filtered_transactions = get_filtered_transactions(filtered_transaction_ids_str)
+        arguments = get_token_arguments(request.form['filter_token'].strip())
+        if arguments is None:
+            return redirect(url_for('report.report'))
         chart_type = request.form['chart_type']
 
         if chart_type == 'pie_expense':
-            filtered_transactions = get_transactions_by_type(filtered_transactions, 'expense')
-            return generate_pie_chart(filtered_transactions)
+            return generate_pie_chart(chart_type,
+                                      category_totals(filter_query(arguments), 'expense'))
         if chart_type == 'pie_income':
-            filtered_transactions = get_transactions_by_type(filtered_transactions, 'income')
-            return generate_pie_chart(filtered_transactions)
+            return generate_pie_chart(chart_type,
+                                      category_totals(filter_query(arguments), 'income'))
 
         return redirect(url_for('report.report'))
 
@@ -3,16 +3,19 @@
 """
 
 from typing import Union
-from flask import render_template, Blueprint, request, redirect, url_for, flash
-from requests.exceptions import HTTPError
+from flask import render_template, Blueprint, request, redirect, url_for, flash, jsonify
+from requests.exceptions import RequestException
+from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.wrappers import Response
 
 from src import config
 from src.utils import update_currency
 from src.utils_api import (
     get_currency_codes,
-    get_exchange_rate,
-    save_default_currency
+    fetch_exchange_rate,
+    get_api_stats,
+    save_default_currency,
+    save_ledger_currency
 )
 from .. import db
 
@@ -35,28 +38,44 @@ def settings() -> str:
 @settings_bp.route('/settings-save', methods=['POST'])
 def settings_save() -> Union[str, Response]:
     """
-    Updates the default currency setting and fetches the exchange rate.
+    Updates the default currency setting.
 
-    If an API error occurs while fetching exchange rates, a flash message is displayed.
-    The new currency is saved in the configuration and database.
+    With conversion on read only the setting changes and amounts are converted when shown.
+    Otherwise the stored amounts are converted to the new currency in one database
+    transaction; if the exchange rate cannot be fetched or the update fails, nothing is
+    changed and a flash message is displayed.
 
     :return: Redirect to the settings page.
     """
     if request.method == 'POST':
-        from_currency = config.DEFAULT_CURRENCY
-        config.DEFAULT_CURRENCY = request.form['default_currency'].strip()
+        new_currency = request.form['default_currency'].strip()
 
-        save_default_currency(config.DEFAULT_CURRENCY)
+        if not config.CONVERT_ON_READ:
+            try:
+                exchange_rate = fetch_exchange_rate(config.LEDGER_CURRENCY, new_currency)
+                update_currency(exchange_rate)
+                db.session.commit()
+            except (RequestException, SQLAlchemyError):
+                db.session.rollback()
+                flash('API not working', 'danger')
+                return redirect(url_for('settings.settings'))
+
+            config.LEDGER_CURRENCY = new_currency
+            save_ledger_currency(config.LEDGER_CURRENCY)
 
-        try:
-            exchange_rate = get_exchange_rate(from_currency, config.DEFAULT_CURRENCY)
-        except HTTPError:
-            flash('API not working', 'danger')
-            return redirect(url_for('settings.settings'))
+        config.DEFAULT_CURRENCY = new_currency
+        save_default_currency(config.DEFAULT_CURRENCY)
 
-        update_currency(exchange_rate)
-        db.session.commit()
         flash('Currency successfully updated.', 'success')
         return redirect(url_for('settings.settings'))
 
     return redirect(url_for('settings.settings'))
+
+@settings_bp.route('/settings-stats', methods=['GET'])
+def settings_stats() -> Response:
+    """
+    Reports the counters of the currency API helpers.
+
+    :return: JSON response with the HTTP client and cache statistics.
+    """
+    return jsonify(get_api_stats())
@@ -0,0 +1,89 @@
+"""
+    Brings an existing database up to date with the current models.
+    `db.create_all()` only creates missing tables, so columns added to existing
+    tables are created here and backfilled for the rows that predate them.
+"""
+
+from collections import Counter
+from typing import Dict, Tuple
+
+from sqlalchemy import inspect, text
+
+from src import db, config
+from src.models import Transaction, MonthlyRollup
+from src.rollup import rebuild_rollup
+from src.utils import transaction_fingerprint
+
+# Columns added after the first release, per table: column name -> SQL column definition.
+ADDED_COLUMNS: Dict[str, Dict[str, str]] = {
+    'transaction': {
+        'original_amount': 'FLOAT',
+        'original_currency': 'VARCHAR(3)',
+        'fingerprint': 'VARCHAR(64)'
+    }
+}
+
+# Indexes added after the first release: index name -> (table, indexed columns).
+ADDED_INDEXES: Dict[str, Tuple[str, str]] = {
+    'ix_transaction_fingerprint': ('transaction', 'fingerprint'),
+    'ix_transaction_date_category_amount': ('transaction', 'date, category_id, amount'),
+    'ix_transaction_category_id': ('transaction', 'category_id'),
+    'ix_transaction_amount': ('transaction', 'amount')
+}
+
+# Indexes made redundant by later ones.
+DROPPED_INDEXES = ('ix_transaction_date',)
+
+def upgrade_schema() -> None:
+    """
+    Add missing columns and indexes to existing tables and backfill the columns,
+    then build the monthly rollup of a database that predates it.
+
+    Must be called inside an application context after `db.create_all()`.
+    """
+    inspector = inspect(db.engine)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, definition in columns.items():
+            if name not in existing:
+                db.session.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {name} {definition}'))
+    for index, (table, columns) in ADDED_INDEXES.items():
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS {index} ON "{table}" ({columns})'))
+    for index in DROPPED_INDEXES:
+        db.session.execute(text(f'DROP INDEX IF EXISTS {index}'))
+
+    db.session.execute(
+        text('UPDATE "transaction" SET original_amount = amount, original_currency = :currency '
+             'WHERE original_amount IS NULL'),
+        {'currency': config.LEDGER_CURRENCY}
+    )
+    backfill_fingerprints()
+    db.session.commit()
+
+    if (db.session.scalar(db.select(MonthlyRollup.id).limit(1)) is None
+            and db.session.scalar(db.select(Transaction.id).limit(1)) is not None):
+        rebuild_rollup()
+
+def backfill_fingerprints() -> None:
+    """
+    Compute the fingerprints of transactions stored before fingerprints existed.
+
+    Identical transactions are numbered in ID order, the same way repeated rows
+    of an imported file are.
+    """
+    rows = db.session.execute(text(
+        'SELECT id, date, category_id, description, original_amount, original_currency '
+        'FROM "transaction" WHERE fingerprint IS NULL ORDER BY id'
+    )).all()
+    if not rows:
+        return
+
+    seen: Counter = Counter()
+    updates = []
+    for row in rows:
+        key = tuple(row[1:])
+        updates.append({'id': row.id,
+                        'fingerprint': transaction_fingerprint(*key, occurrence=seen[key])})
+        seen[key] += 1
+    db.session.execute(text('UPDATE "transaction" SET fingerprint = :fingerprint WHERE id = :id'),
+                       updates)
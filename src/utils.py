@@ -2,18 +2,111 @@
     Utility functions for database operations and currency handling.
 """
 
-from typing import List, Optional
-
-from src import db
+import base64
+import binascii
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import g, has_request_context
+from requests.exceptions import RequestException
+from sqlalchemy import Select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+
+from src import db, config
 from src.models import Transaction, Category, Budget
+from src.rollup import add_transaction_to_rollup, rollup_category_total, rollup_totals, scale_rollup
+from src.utils_api import fetch_exchange_rate
+
+def with_category(statement: Select) -> Select:
+    """
+    Load the category of every transaction in the same query, so templates and
+    code reading `transaction.category` do not issue one SELECT per row.
+
+    :param statement: A query for transactions.
+    :return: The query with the categories joined in.
+    """
+    return statement.options(joinedload(Transaction.category))
 
 def get_transactions() -> List[Transaction]:
     """
-    Fetch all transactions from the database.
+    Fetch all transactions from the database together with their categories.
 
     :return: A list of all transactions.
     """
-    return [el[0] for el in db.session.execute(db.select(Transaction))]
+    return list(db.session.execute(with_category(db.select(Transaction))).scalars())
+
+def page_size(requested: Optional[str]) -> int:
+    """
+    Parse a requested page size, falling back to PAGE_SIZE and capped at MAX_PAGE_SIZE.
+
+    :param requested: The submitted page size.
+    :return: The number of transactions per page.
+    """
+    try:
+        size = int(requested) if requested else config.PAGE_SIZE
+    except ValueError:
+        size = config.PAGE_SIZE
+    return max(1, min(size, config.MAX_PAGE_SIZE))
+
+def encode_cursor(transaction: Transaction) -> str:
+    """
+    Encode the position of a transaction in the (date, id) order.
+
+    :param transaction: The last transaction of a page.
+    :return: An opaque URL-safe cursor.
+    """
+    position = f'{transaction.date}|{transaction.id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(position).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    :param cursor: The cursor.
+    :return: The date and ID of the last transaction of the previous page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        date, transaction_id = base64.urlsafe_b64decode(cursor.encode('ascii')) \
+            .decode('utf-8').rsplit('|', 1)
+        return date, int(transaction_id)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+
+def get_transaction_page(statement: Optional[Select] = None, cursor: Optional[str] = None,
+                         limit: Optional[int] = None,
+                         newest_first: bool = False) -> Tuple[List[Transaction], Optional[str]]:
+    """
+    Fetch one page of transactions ordered by (date, id), seeking past the cursor
+    instead of skipping rows, so every page costs the same however deep it is.
+
+    :param statement: The transaction query to page through, all transactions if omitted.
+    :param cursor: The cursor of the previous page, None for the first page.
+    :param limit: Number of transactions per page, PAGE_SIZE if omitted.
+    :param newest_first: Whether to page from the latest transaction backwards.
+    :return: The transactions with their categories loaded, and the cursor of the next page
+             or None if this is the last page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    limit = limit or config.PAGE_SIZE
+    if statement is None:
+        statement = db.select(Transaction)
+    position = db.tuple_(Transaction.date, Transaction.id)
+    if cursor:
+        after = db.tuple_(*decode_cursor(cursor))
+        statement = statement.where(position < after if newest_first else position > after)
+    order = ((Transaction.date.desc(), Transaction.id.desc()) if newest_first
+             else (Transaction.date, Transaction.id))
+
+    transactions = list(db.session.execute(
+        with_category(statement)
+        .order_by(None).order_by(*order)
+        .limit(limit + 1)
+    ).scalars())
+    if len(transactions) <= limit:
+        return transactions, None
+    return transactions[:limit], encode_cursor(transactions[limit - 1])
 
 def get_categories() -> List[Category]:
     """
@@ -25,11 +118,13 @@ def get_categories() -> List[Category]:
 
 def get_budgets() -> List[Budget]:
     """
-    Fetch all budgets from the database.
+    Fetch all budgets from the database together with their categories.
 
     :return: A list of all budgets.
     """
-    return [el[0] for el in db.session.execute(db.select(Budget))]
+    return list(db.session.execute(
+        db.select(Budget).options(joinedload(Budget.category))
+    ).scalars())
 
 def get_categories_by_type(category_type: str) -> List[Category]:
     """
@@ -52,6 +147,78 @@ def get_category_by_name(category_name: str) -> Optional[Category]:
         db.select(Category).filter_by(name=category_name)
         ).scalar_one_or_none()
 
+def normalize_category_name(category_name: str) -> str:
+    """
+    Normalize a category name for lookups: collapse whitespace and ignore case.
+
+    :param category_name: The name of the category.
+    :return: The normalized name.
+    """
+    return ' '.join(category_name.split()).casefold()
+
+class CategoryIndex:
+    """
+    Lookup of categories by normalized name and by ID, built with a single query.
+
+    Attributes:
+        name_ids (dict[str, int]): Mapping of normalized category name to category ID.
+        names (dict[int, str]): Mapping of category ID to category name.
+        types (dict[int, str]): Mapping of category ID to category type.
+    """
+    def __init__(self, categories: List[Category]) -> None:
+        """
+        Builds the index from a list of categories.
+
+        :param categories: The categories to index.
+        """
+        self.name_ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.types: Dict[int, str] = {}
+        for category in categories:
+            self.name_ids.setdefault(normalize_category_name(category.name), category.id)
+            self.names[category.id] = category.name
+            self.types[category.id] = category.category_type
+
+    def get_id(self, category_name: str) -> Optional[int]:
+        """
+        Find a category ID by name, ignoring case and extra whitespace.
+
+        :param category_name: The name of the category.
+        :return: The category ID if found, else None.
+        """
+        return self.name_ids.get(normalize_category_name(category_name))
+
+    def get_type(self, category_id: int) -> Optional[str]:
+        """
+        Find the type of a category.
+
+        :param category_id: The ID of the category.
+        :return: The category type if found, else None.
+        """
+        return self.types.get(category_id)
+
+    def ids_of_type(self, category_type: str) -> Set[int]:
+        """
+        Collect the IDs of all categories of a type.
+
+        :param category_type: The type of category (e.g., 'expense', 'income').
+        :return: A set of category IDs.
+        """
+        return {category_id for category_id, current_type in self.types.items()
+                if current_type == category_type}
+
+def get_category_index() -> CategoryIndex:
+    """
+    Get the category index, built once per request.
+
+    :return: The category index.
+    """
+    if not has_request_context():
+        return CategoryIndex(get_categories())
+    if 'category_index' not in g:
+        g.category_index = CategoryIndex(get_categories())
+    return g.category_index
+
 def get_category_by_id(category_id: int) -> Optional[Category]:
     """
     Fetch a category by its ID.
@@ -65,13 +232,13 @@ def get_category_by_id(category_id: int) -> Optional[Category]:
 
 def get_transaction_by_id(transaction_id: int) -> Optional[Transaction]:
     """
-    Fetch a transaction by its ID.
+    Fetch a transaction by its ID together with its category.
 
     :param transaction_id: The ID of the transaction.
     :return: The transaction object if found, else None.
     """
     return db.session.execute(
-            db.select(Transaction).filter_by(id=transaction_id)
+            with_category(db.select(Transaction).filter_by(id=transaction_id))
             ).scalar_one_or_none()
 
 
@@ -80,6 +247,9 @@ def get_transactions_by_type(transactions: List[Transaction],
     """
     Filters transactions based on the category type (e.g., 'expense' or 'income').
 
+    Load the transactions with `with_category` so that reading the category
+    type does not query the database once per transaction.
+
     :param transactions: List of transactions.
     :param category_type: The category type to filter by.
 
@@ -88,27 +258,62 @@ def get_transactions_by_type(transactions: List[Transaction],
     return [transaction for transaction in transactions
             if transaction.category.category_type == category_type]
 
-def calculate_income() -> float:
+def calculate_totals(from_date: Optional[str] = None,
+                     to_date: Optional[str] = None) -> Dict[str, float]:
     """
-    Calculate the total income from transactions.
+    Calculate the income and expense totals with a single SUM ... GROUP BY category_type.
+
+    Without a date range the totals come from the monthly rollup, otherwise the
+    transactions in the range are summed using the (date, category_id, amount) index.
 
+    :param from_date: First date included, in 'YYYY-MM-DD' format.
+    :param to_date: Last date included, in 'YYYY-MM-DD' format.
+    :return: Mapping of 'income' and 'expense' to their totals.
+    """
+    totals = {'income': 0.0, 'expense': 0.0}
+    if from_date is None and to_date is None:
+        totals.update(rollup_totals())
+        return totals
+
+    statement = (db.select(Category.category_type, db.func.sum(Transaction.amount))
+                 .join(Category, Category.id == Transaction.category_id)
+                 .group_by(Category.category_type))
+    if from_date is not None:
+        statement = statement.where(Transaction.date >= from_date)
+    if to_date is not None:
+        statement = statement.where(Transaction.date <= to_date)
+    totals.update({category_type: float(total)
+                   for category_type, total in db.session.execute(statement)})
+    return totals
+
+def calculate_income(from_date: Optional[str] = None, to_date: Optional[str] = None) -> float:
+    """
+    Calculate the total income, optionally within a date range.
+
+    :param from_date: First date included, in 'YYYY-MM-DD' format.
+    :param to_date: Last date included, in 'YYYY-MM-DD' format.
     :return: The total income amount.
     """
-    transactions = [el[0].amount for el in
-                    db.session.execute(db.select(Transaction)
-                                       .filter(Transaction.category.has(category_type='income')))]
-    return sum(transactions)
+    return calculate_totals(from_date, to_date)['income']
 
-def calculate_expense() -> float:
+def calculate_expense(from_date: Optional[str] = None, to_date: Optional[str] = None) -> float:
     """
-    Calculate the total expense from transactions.
+    Calculate the total expense, optionally within a date range.
 
+    :param from_date: First date included, in 'YYYY-MM-DD' format.
+    :param to_date: Last date included, in 'YYYY-MM-DD' format.
     :return: The total expense amount.
     """
-    transactions = [el[0].amount for el in
-                    db.session.execute(db.select(Transaction)
-                                       .filter(Transaction.category.has(category_type='expense')))]
-    return sum(transactions)
+    return calculate_totals(from_date, to_date)['expense']
+
+def calculate_category_total(category_id: int) -> float:
+    """
+    Calculate the total of a category from the monthly rollup.
+
+    :param category_id: The ID of the category.
+    :return: The total amount.
+    """
+    return rollup_category_total(category_id)
 
 def get_budget_by_category(category_id: int) -> Optional[Budget]:
     """
@@ -137,6 +342,23 @@ def add_budget_expense(budget: Optional[Budget], transaction_amount: float) -> N
         budget.current_budget += transaction_amount
         db.session.commit()
 
+def add_budget_expenses(totals: Dict[int, float]) -> None:
+    """
+    Add expenses to several budgets with one atomic increment, without committing.
+
+    :param totals: Mapping of category ID (0 for the overall budget) to the amount to add.
+    """
+    if not totals:
+        return
+
+    db.session.execute(
+        db.update(Budget)
+        .where(Budget.category_id.in_(totals))
+        .values(current_budget=Budget.current_budget
+                + db.case(totals, value=Budget.category_id, else_=0.0))
+        .execution_options(synchronize_session=False)
+    )
+
 def update_budget_expense(budget: Optional[Budget],
                           current_amount: float,
                           updated_amount: float) -> None:
@@ -167,14 +389,19 @@ def delete_budget_expense(transaction: Transaction, budget: Optional[Budget]) ->
         budget.current_budget -= transaction.amount
         db.session.commit()
 
-def create_transaction(category_id: int, description: str, amount: float, date: str) -> Transaction:
+def create_transaction(category_id: int, description: str, amount: float, date: str,
+                       original_amount: Optional[float] = None,
+                       original_currency: Optional[str] = None) -> Transaction:
     """
     Creates and saves a new transaction in the database.
 
     :param category_id: The ID of the category associated with the transaction.
     :param description: A brief description of the transaction.
-    :param amount: The amount of the transaction (expected as a numeric value).
+    :param amount: The amount of the transaction in the ledger currency.
     :param date: The date of the transaction in 'YYYY-MM-DD' format.
+    :param original_amount: The amount as entered, defaults to the ledger amount.
+    :param original_currency: The currency the amount was entered in,
+                              defaults to the ledger currency.
     :return: The newly created Transaction object.
     :raises ValueError: If the amount is not a valid number.
     """
@@ -183,30 +410,142 @@ def create_transaction(category_id: int, description: str, amount: float, date:
     except ValueError as exc:
         raise ValueError('Invalid transaction amount.') from exc
 
+    original_amount = amount if original_amount is None else original_amount
+    original_currency = original_currency or config.LEDGER_CURRENCY
     new_transaction = Transaction(
         category_id=category_id,
         description=description.strip(),
         amount=amount,
-        date=date
+        original_amount=original_amount,
+        original_currency=original_currency,
+        date=date,
+        fingerprint=transaction_fingerprint(date, category_id, description.strip(),
+                                            original_amount, original_currency)
     )
 
     db.session.add(new_transaction)
+    add_transaction_to_rollup(new_transaction)
     db.session.commit()
 
     return new_transaction
 
+def transaction_fingerprint(date: str, category_id: int, description: Optional[str],
+                            original_amount: float, original_currency: str,
+                            occurrence: int = 0) -> str:
+    """
+    Hash the fields that identify a transaction, used to skip rows that were imported before.
+
+    :param date: The date of the transaction in 'YYYY-MM-DD' format.
+    :param category_id: The ID of the category.
+    :param description: The description of the transaction.
+    :param original_amount: The amount as entered or imported.
+    :param original_currency: The currency of the original amount.
+    :param occurrence: Number of identical rows before this one in the same file,
+                       so that repeated rows (e.g. two equal purchases on one day) are kept.
+    :return: The hex SHA-256 of the fields.
+    """
+    key = '|'.join((date, str(int(category_id)), description or '',
+                    repr(float(original_amount)), original_currency or '', str(occurrence)))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def get_existing_fingerprints(fingerprints: Iterable[str], batch_size: int = 5000) -> Set[str]:
+    """
+    Find which of the given fingerprints already belong to stored transactions.
+
+    :param fingerprints: The fingerprints to look up.
+    :param batch_size: Maximum number of fingerprints per query.
+    :return: The fingerprints that are already stored.
+    """
+    fingerprints = list(fingerprints)
+    existing: Set[str] = set()
+    for start in range(0, len(fingerprints), batch_size):
+        existing.update(db.session.execute(
+            db.select(Transaction.fingerprint)
+            .where(Transaction.fingerprint.in_(fingerprints[start:start + batch_size]))
+        ).scalars())
+    return existing
+
+
+def _current_display() -> Tuple[float, str]:
+    """
+    Get the rate and currency that ledger amounts are shown in, looked up once per request.
+
+    Amounts are shown in the default currency; if its exchange rate cannot be fetched,
+    they are shown unconverted in the ledger currency instead.
+
+    :return: The rate from the ledger currency and the currency amounts are shown in.
+    """
+    currencies = (config.LEDGER_CURRENCY, config.DEFAULT_CURRENCY)
+    if has_request_context() and g.get('display_currencies') == currencies:
+        return g.display
+
+    try:
+        display = (fetch_exchange_rate(*currencies), config.DEFAULT_CURRENCY)
+    except RequestException:
+        display = (1.0, config.LEDGER_CURRENCY)
+    if has_request_context():
+        g.display = display
+        g.display_currencies = currencies
+    return display
+
+def get_display_rate() -> float:
+    """
+    Get the rate that converts ledger amounts to the currency they are shown in.
+
+    :return: The exchange rate from the ledger currency to the default currency,
+             or 1 if it is unavailable and amounts are shown in the ledger currency.
+    """
+    return _current_display()[0]
+
+def get_display_currency() -> str:
+    """
+    Get the currency that ledger amounts are shown in.
+
+    :return: The default currency, or the ledger currency if the exchange rate
+             between them is unavailable.
+    """
+    return _current_display()[1]
+
+def to_display_amount(amount: float) -> float:
+    """
+    Convert an amount stored in the ledger currency to the currency it is shown in.
+
+    :param amount: The amount in the ledger currency.
+    :return: The amount in the display currency, see `get_display_currency`.
+    """
+    return amount * get_display_rate()
+
+def from_display_amount(amount: float) -> float:
+    """
+    Convert an amount given in the default currency to the ledger currency.
+
+    Used before storing amounts, so a missing exchange rate is an error
+    rather than a rate of 1.
+
+    :param amount: The amount in the default currency.
+    :return: The amount in the ledger currency.
+    :raises RequestException: If the exchange rate cannot be fetched.
+    """
+    return amount / fetch_exchange_rate(config.LEDGER_CURRENCY, config.DEFAULT_CURRENCY)
 
 def update_currency(exchange_rate: float) -> None:
     """
     Update transaction and budget amounts based on the exchange rate.
 
+    Only used when amounts are converted in place (CONVERT_ON_READ disabled),
+    the original amounts are left untouched. Both tables and the monthly rollup are
+    updated with set-based UPDATE statements in the current database transaction;
+    the caller commits, and on a database error the transaction is rolled back.
+
     :param exchange_rate: The exchange rate to apply.
     """
-    transactions = get_transactions()
-    for transaction in transactions:
-        transaction.amount *= exchange_rate
-
-    budgets = get_budgets()
-    for budget in budgets:
-        budget.current_budget *= exchange_rate
-        budget.total_budget *= exchange_rate
+    try:
+        db.session.execute(db.update(Transaction)
+                           .values(amount=Transaction.amount * exchange_rate))
+        db.session.execute(db.update(Budget)
+                           .values(current_budget=Budget.current_budget * exchange_rate,
+                                   total_budget=Budget.total_budget * exchange_rate))
+        scale_rollup(exchange_rate)
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
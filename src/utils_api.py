@@ -5,26 +5,56 @@
 """
 
 import os
-from typing import List
+from typing import Any, Dict, FrozenSet, List, Optional
 
 import requests
 
-from src.config import BASE_URL
+from src import config
+from src.api_client import ApiClient
+from src.currency_catalogue import CurrencyCatalogue
+from src.rate_cache import RateCache
 
-def get_currency_codes() -> List[str]:
+api_client = ApiClient(config.BASE_URL,
+                       timeout=(config.API_CONNECT_TIMEOUT, config.API_READ_TIMEOUT),
+                       retries=config.API_RETRIES,
+                       backoff=config.API_BACKOFF,
+                       deadline=config.API_DEADLINE,
+                       pool_size=config.API_POOL_SIZE,
+                       failure_threshold=config.API_FAILURE_THRESHOLD,
+                       reset_timeout=config.API_RESET_TIMEOUT)
+
+rate_cache = RateCache(config.RATE_CACHE_TTL, config.RATE_CACHE_MAX_SIZE, config.RATE_CACHE_PATH)
+
+def fetch_currency_codes() -> Optional[List[str]]:
     """
     Retrieve supported currency codes from the external API.
 
-    :return: A list of supported currency codes.
+    :return: A list of supported currency codes, or None if the request failed.
     """
-    url = f'{BASE_URL}/codes'
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = api_client.get_json('codes', '/codes')
         return [code[0] for code in data['supported_codes']]
-    except requests.RequestException:
-        return ['USD', 'EUR', 'BGN']  # Default fallback
+    except (requests.RequestException, KeyError):
+        return None
+
+currency_catalogue = CurrencyCatalogue(fetch_currency_codes, config.CURRENCY_CODES_REFRESH,
+                                       config.CURRENCY_CODES_SNAPSHOT)
+
+def get_currency_codes() -> List[str]:
+    """
+    Return the supported currency codes from the process-wide catalogue.
+
+    :return: A list of supported currency codes.
+    """
+    return currency_catalogue.codes()
+
+def get_currency_code_set() -> FrozenSet[str]:
+    """
+    Return the supported currency codes as a frozenset for membership checks.
+
+    :return: A frozenset of supported currency codes.
+    """
+    return currency_catalogue.code_set()
 
 def get_exchange_rate(from_currency: str, to_currency: str) -> float:
     """
@@ -32,16 +62,73 @@ def get_exchange_rate(from_currency: str, to_currency: str) -> float:
 
     :param from_currency: The base currency.
     :param to_currency: The target currency.
-    :return: The exchange rate.
+    :return: The exchange rate, or 1 if it could not be fetched.
     """
-    url = f'{BASE_URL}/pair/{from_currency}/{to_currency}'
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json().get('conversion_rate', 1)
+        return fetch_exchange_rate(from_currency, to_currency)
     except requests.RequestException:
         return 1
 
+def fetch_exchange_rate(from_currency: str, to_currency: str) -> float:
+    """
+    Fetch the exchange rate between two currencies, raising if it is unavailable.
+
+    Rates are served from the cache while they are fresh; failed lookups are not cached.
+    In 'sheet' mode a single rate sheet for the default currency is fetched and every pair
+    is derived from it, the pair endpoint is only used for currencies missing from the sheet.
+
+    :param from_currency: The base currency.
+    :param to_currency: The target currency.
+    :return: The exchange rate.
+    :raises requests.RequestException: If the rate cannot be fetched.
+    """
+    if from_currency == to_currency:
+        return 1
+
+    base_currency = config.DEFAULT_CURRENCY or from_currency
+    cached_rate = rate_cache.get(from_currency, to_currency, pivot=base_currency)
+    if cached_rate is not None:
+        return cached_rate
+
+    if config.RATE_SOURCE == 'sheet' and load_rate_sheet(base_currency):
+        cached_rate = rate_cache.get(from_currency, to_currency, pivot=base_currency)
+        if cached_rate is not None:
+            return cached_rate
+
+    exchange_rate = api_client.get_json('pair', f'/pair/{from_currency}/{to_currency}'
+                                        ).get('conversion_rate')
+    if exchange_rate is None:
+        raise requests.RequestException(f'No rate for {from_currency}/{to_currency}')
+
+    rate_cache.set(from_currency, to_currency, exchange_rate)
+    return exchange_rate
+
+def load_rate_sheet(base_currency: str) -> bool:
+    """
+    Fetch the latest rates for a base currency and store them in the rate cache.
+
+    :param base_currency: The currency the rate sheet is quoted against.
+    :return: True if the sheet was loaded, False otherwise.
+    """
+    try:
+        rates = api_client.get_json('latest', f'/latest/{base_currency}').get('conversion_rates')
+    except requests.RequestException:
+        return False
+
+    if not rates:
+        return False
+
+    rate_cache.set_many(base_currency, rates)
+    return True
+
+def get_api_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Collect the counters of the currency API helpers.
+
+    :return: A dictionary with the HTTP client metrics and the exchange-rate cache statistics.
+    """
+    return {'http': api_client.stats(), 'rate_cache': rate_cache.stats()}
+
 def load_default_currency() -> str:
     """
     Load the default currency from a file.
@@ -52,7 +139,7 @@ def load_default_currency() -> str:
         with open(os.path.join('currency.txt'), 'r', encoding='utf-8') as fp:
             default_currency = fp.read()
 
-        currency_codes = get_currency_codes()
+        currency_codes = get_currency_code_set()
         default_currency = default_currency if default_currency in currency_codes else 'BGN'
     else:
         default_currency = 'BGN'
@@ -67,3 +154,28 @@ def save_default_currency(currency: str) -> None:
     """
     with open(os.path.join('currency.txt'), 'w', encoding='utf-8') as fp:
         fp.write(currency)
+
+def load_ledger_currency() -> str:
+    """
+    Load the ledger currency from a file.
+
+    When no ledger currency was saved yet, the stored amounts are in the default currency,
+    which is then saved as the ledger currency.
+
+    :return: The ledger currency code.
+    """
+    if os.path.exists('ledger_currency.txt'):
+        with open(os.path.join('ledger_currency.txt'), 'r', encoding='utf-8') as fp:
+            return fp.read()
+
+    save_ledger_currency(config.DEFAULT_CURRENCY)
+    return config.DEFAULT_CURRENCY
+
+def save_ledger_currency(currency: str) -> None:
+    """
+    Save the ledger currency to a file.
+
+    :param currency: The currency code to save.
+    """
+    with open(os.path.join('ledger_currency.txt'), 'w', encoding='utf-8') as fp:
+        fp.write(currency)
@@ -0,0 +1,96 @@
+"""
+    Shared test fixtures.
+    A local stand-in for the exchange-rate API is started before the application
+    is imported, so `src.config` picks up its URL instead of the real API.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+import pytest
+from flask import Flask
+
+# Units of each currency per BGN.
+RATES = {'BGN': 1.0, 'EUR': 0.5113, 'USD': 0.55, 'GBP': 0.43}
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """
+    Serves the /codes, /latest/{base} and /pair/{from}/{to} endpoints from RATES
+    and records the path of every request.
+    """
+    calls: List[str] = []
+
+    def log_message(self, *_: object) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer an API request.
+        """
+        self.calls.append(self.path)
+        parts = self.path.strip('/').split('/')
+        if parts[-1] == 'codes':
+            body = {'supported_codes': [[code, code] for code in RATES]}
+        elif len(parts) >= 2 and parts[-2] == 'latest':
+            base = parts[-1]
+            body = {'conversion_rates': {code: rate / RATES[base] for code, rate in RATES.items()}}
+        elif len(parts) >= 3 and parts[-3] == 'pair':
+            body = {'conversion_rate': RATES[parts[-1]] / RATES[parts[-2]]}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+stub_server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+threading.Thread(target=stub_server.serve_forever, name='stub-api', daemon=True).start()
+
+os.environ.update(API_KEY='test-key',
+                  SECRET_KEY='test-secret',
+                  API_URL=f'http://127.0.0.1:{stub_server.server_address[1]}/v6',
+                  CURRENCY_CODES_SNAPSHOT=os.path.join(tempfile.mkdtemp(), 'currency_codes.json'))
+
+# pylint: disable=wrong-import-position
+from src import config, create_app, db
+from src.utils_api import rate_cache
+
+@pytest.fixture
+def api_calls() -> List[str]:
+    """
+    Paths requested from the stub API during the test.
+    """
+    StubApiHandler.calls.clear()
+    return StubApiHandler.calls
+
+@pytest.fixture
+def app(tmp_path, monkeypatch) -> Iterator[Flask]:
+    """
+    An application in testing mode with its own database and working directory,
+    an empty rate cache and the default and ledger currency restored afterwards.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    rate_cache.clear()
+
+    application = create_app()
+    application.config['TESTING'] = True
+    monkeypatch.setattr(config, 'DEFAULT_CURRENCY', config.DEFAULT_CURRENCY)
+    monkeypatch.setattr(config, 'LEDGER_CURRENCY', config.LEDGER_CURRENCY)
+
+    yield application
+
+    with application.app_context():
+        db.session.remove()
+        db.engine.dispose()
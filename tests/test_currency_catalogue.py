@@ -0,0 +1,36 @@
+"""
+    The currency code list is fetched once on a cold start.
+"""
+
+import time
+
+from src.currency_catalogue import CurrencyCatalogue
+
+def test_cold_start_fetches_the_codes_once(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(time.time())
+        return ['BGN', 'EUR', 'USD']
+
+    catalogue = CurrencyCatalogue(fetch, refresh_interval=60,
+                                  snapshot_path=str(tmp_path / 'currency_codes.json'))
+    assert 'EUR' in catalogue.code_set()
+    catalogue.start_refresh()
+    time.sleep(0.2)
+
+    assert len(calls) == 1
+
+def test_refresher_fetches_an_empty_catalogue_at_once():
+    calls = []
+
+    def fetch():
+        calls.append(time.time())
+        return ['BGN']
+
+    CurrencyCatalogue(fetch, refresh_interval=60).start_refresh()
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert len(calls) == 1
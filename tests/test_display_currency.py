@@ -0,0 +1,54 @@
+"""
+    Amounts are only converted with a fetched exchange rate, never with a stand-in rate of 1.
+"""
+
+import pytest
+from requests.exceptions import RequestException
+
+from src import config, db
+from src.models import Budget, Category
+
+def unavailable_rate(*_):
+    raise RequestException('API down')
+
+@pytest.fixture
+def usd_display(app, monkeypatch):
+    """
+    A ledger kept in BGN and shown in USD, with one budget of 550 USD.
+    """
+    monkeypatch.setattr(config, 'LEDGER_CURRENCY', 'BGN')
+    monkeypatch.setattr(config, 'DEFAULT_CURRENCY', 'USD')
+    with app.app_context():
+        category = Category(name='Food', category_type='expense')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Budget(category_id=category.id, current_budget=0.0, total_budget=1000.0))
+        db.session.commit()
+    return app
+
+def test_budget_is_not_saved_without_a_rate(usd_display, monkeypatch):
+    monkeypatch.setattr('src.utils.fetch_exchange_rate', unavailable_rate)
+
+    response = usd_display.test_client().post('/budget-set', data={'category_select': '0',
+                                                                   'total_budget': '100'})
+
+    assert response.status_code == 302
+    with usd_display.app_context():
+        assert db.session.scalar(db.select(Budget).where(Budget.category_id == 0)) is None
+
+def test_budget_is_saved_in_the_ledger_currency(usd_display):
+    usd_display.test_client().post('/budget-set', data={'category_select': '0',
+                                                        'total_budget': '110'})
+
+    with usd_display.app_context():
+        budget = db.session.scalar(db.select(Budget).where(Budget.category_id == 0))
+        assert budget.total_budget == pytest.approx(200.0)
+
+def test_amounts_are_shown_in_the_ledger_currency_without_a_rate(usd_display, monkeypatch):
+    client = usd_display.test_client()
+    assert '550.00 USD' in client.get('/budget').get_data(as_text=True)
+
+    monkeypatch.setattr('src.utils.fetch_exchange_rate', unavailable_rate)
+    body = client.get('/budget').get_data(as_text=True)
+    assert '1000.00 BGN' in body
+    assert 'USD' not in body
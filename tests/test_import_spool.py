@@ -0,0 +1,35 @@
+"""
+    Uploads that cannot be spooled leave nothing behind in the spool directory.
+"""
+
+import errno
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from src import config
+
+@pytest.mark.parametrize('background', [False, True])
+def test_failed_spooling_removes_spooled_uploads(app, tmp_path, monkeypatch, background):
+    spool_dir = tmp_path / 'spool'
+    monkeypatch.setattr(config, 'IMPORT_SPOOL_DIR', str(spool_dir))
+    monkeypatch.setattr(config, 'IMPORT_BACKGROUND', background)
+    save = FileStorage.save
+
+    def save_until_full(file, destination, *args):
+        if file.filename == 'second.csv':
+            destination.write(b'date,')
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return save(file, destination, *args)
+
+    monkeypatch.setattr(FileStorage, 'save', save_until_full)
+    header = b'date,category,description,amount,currency\n'
+
+    response = app.test_client().post('/home-import', data={'csv_file': [
+        (io.BytesIO(header), 'first.csv'),
+        (io.BytesIO(header), 'second.csv')
+    ]}, follow_redirects=True)
+
+    assert 'Could not store the upload: No space left on device' in response.get_data(as_text=True)
+    assert not list(spool_dir.iterdir())
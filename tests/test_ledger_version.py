@@ -0,0 +1,43 @@
+"""
+    The ledger version lives in the database, so every process sees the same one.
+"""
+
+import sqlite3
+
+from src import db
+from src.models import Category
+from src.ledger_version import current_ledger_version
+
+def test_commits_bump_the_version_and_rollbacks_do_not(app):
+    with app.app_context():
+        assert current_ledger_version() == 0
+
+        db.session.add(Category(name='Food', category_type='expense'))
+        db.session.commit()
+        first = current_ledger_version()
+        assert first > 0
+
+        db.session.add(Category(name='Rent', category_type='expense'))
+        db.session.flush()
+        db.session.rollback()
+        assert current_ledger_version() == first
+
+        db.session.execute(db.update(Category).values(name='Groceries'))
+        db.session.commit()
+        assert current_ledger_version() == first + 1
+
+def test_chart_etag_follows_writes_of_other_processes(app, tmp_path):
+    with app.app_context():
+        db.session.add(Category(name='Food', category_type='expense'))
+        db.session.commit()
+    client = app.test_client()
+    etag = client.get('/report-chart-data').headers['ETag']
+    assert client.get('/report-chart-data', headers={'If-None-Match': etag}).status_code == 304
+
+    # Another worker bumps the version in the shared database.
+    with sqlite3.connect(tmp_path / 'test.db') as connection:
+        connection.execute('UPDATE ledger_version SET version = version + 1')
+
+    response = client.get('/report-chart-data', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
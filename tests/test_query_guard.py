@@ -0,0 +1,61 @@
+"""
+    Requests stay within the per-request query budget.
+"""
+
+import io
+
+import pytest
+
+from src import config, db
+from src.models import Category, Transaction
+from src.query_guard import QueryLimitExceeded
+
+QUERY_LIMIT = 10
+
+@pytest.fixture
+def ledger(app, monkeypatch):
+    """
+    An application with a low query budget and transactions in several categories.
+    """
+    monkeypatch.setattr(config, 'MAX_QUERIES_PER_REQUEST', QUERY_LIMIT)
+    with app.app_context():
+        categories = [Category(name=f'Category {number}', category_type='expense')
+                      for number in range(QUERY_LIMIT * 2)]
+        db.session.add_all(categories)
+        db.session.flush()
+        db.session.add_all(Transaction(date=f'2026-01-{number % 28 + 1:02d}',
+                                       category_id=category.id,
+                                       description=f'Transaction {number}',
+                                       amount=10.0, fingerprint=str(number))
+                           for number, category in enumerate(categories))
+        db.session.commit()
+    return app
+
+def test_home_stays_within_the_query_limit(ledger):
+    response = ledger.test_client().get('/home')
+
+    assert response.status_code == 200
+    assert 'Transaction 0' in response.get_data(as_text=True)
+
+def test_lazy_loading_per_row_exceeds_the_query_limit(ledger):
+    @ledger.route('/n-plus-one')
+    def n_plus_one():
+        transactions = db.session.scalars(db.select(Transaction)).all()
+        return ', '.join(transaction.category.name for transaction in transactions)
+
+    with pytest.raises(QueryLimitExceeded):
+        ledger.test_client().get('/n-plus-one')
+
+def test_imports_are_exempt_from_the_query_limit(ledger, monkeypatch):
+    monkeypatch.setattr(config, 'IMPORT_BACKGROUND', False)
+    monkeypatch.setattr(config, 'IMPORT_CHUNK_SIZE', 1)
+    rows = ''.join(f'2026-02-01,Category {number},Imported {number},5.0,BGN\n'
+                   for number in range(QUERY_LIMIT * 2))
+    upload = io.BytesIO(f'date,category,description,amount,currency\n{rows}'.encode())
+
+    response = ledger.test_client().post('/home-import',
+                                         data={'csv_file': (upload, 'ledger.csv')})
+
+    assert response.status_code == 302
+    with ledger.app_context():
+        assert db.session.scalar(db.select(db.func.count(Transaction.id))) == QUERY_LIMIT * 4
@@ -0,0 +1,41 @@
+"""
+    Exchange rates are derived from one rate sheet per default currency.
+"""
+
+import pytest
+
+from src import config
+from src.routes.home.validators import validate_currency
+from src.utils_api import fetch_exchange_rate
+from .conftest import RATES
+
+def rate_calls(api_calls):
+    """
+    Keep the rate requests, ignoring the currency code list.
+    """
+    return [path for path in api_calls if '/latest/' in path or '/pair/' in path]
+
+def test_one_sheet_serves_transactions_and_settings(app, api_calls, monkeypatch):
+    monkeypatch.setattr(config, 'CONVERT_ON_READ', False)
+    assert config.DEFAULT_CURRENCY == config.LEDGER_CURRENCY == 'BGN'
+
+    with app.test_request_context():
+        amounts = {currency: validate_currency(currency, 100.0)
+                   for currency in ('EUR', 'USD', 'GBP')}
+    response = app.test_client().post('/settings-save', data={'default_currency': 'USD'})
+
+    assert response.status_code == 302
+    assert config.LEDGER_CURRENCY == 'USD'
+    assert rate_calls(api_calls) == ['/v6/test-key/latest/BGN']
+    for currency, amount in amounts.items():
+        assert amount == pytest.approx(100.0 * RATES['BGN'] / RATES[currency])
+
+@pytest.mark.parametrize('from_currency, to_currency', [
+    ('EUR', 'USD'), ('USD', 'EUR'), ('GBP', 'USD'), ('EUR', 'GBP'), ('BGN', 'EUR'), ('GBP', 'BGN')
+])
+def test_cross_rates_through_the_pivot(app, api_calls, from_currency, to_currency):
+    with app.app_context():
+        rate = fetch_exchange_rate(from_currency, to_currency)
+
+    assert rate == pytest.approx(RATES[to_currency] / RATES[from_currency])
+    assert rate_calls(api_calls) == ['/v6/test-key/latest/BGN']
@@ -0,0 +1,40 @@
+"""
+    The monthly rollup is built for existing ledgers and kept up to date on any database.
+"""
+
+from src import create_app, db, rollup
+from src.models import Category, MonthlyRollup, Transaction
+from src.rollup import add_to_rollup, check_rollup, rollup_totals
+
+def add_ledger():
+    category = Category(name='Food', category_type='expense')
+    db.session.add(category)
+    db.session.flush()
+    db.session.execute(db.insert(Transaction), [
+        {'date': f'2026-0{month}-01', 'category_id': category.id, 'description': 'Lunch',
+         'amount': 10.0, 'fingerprint': str(month)}
+        for month in (1, 2, 3)
+    ])
+    db.session.commit()
+    return category.id
+
+def test_create_app_builds_a_missing_rollup(app):
+    with app.app_context():
+        add_ledger()
+        assert not rollup_totals()
+
+    with create_app().app_context():
+        assert rollup_totals() == {'expense': 30.0}
+        assert not check_rollup()
+
+def test_changes_are_applied_without_on_conflict(app, monkeypatch):
+    monkeypatch.setattr(rollup, 'UPSERT_INSERTS', {})
+    with app.app_context():
+        category_id = add_ledger()
+        add_to_rollup([('2026-01-01', category_id, 10.0, 1), ('2026-02-15', category_id, 10.0, 1),
+                       ('2026-03-31', category_id, 10.0, 1)])
+        add_to_rollup([('2026-01-05', category_id, 5.0, 1), ('2026-01-05', category_id, -5.0, -1)])
+        db.session.commit()
+
+        assert db.session.scalar(db.select(db.func.count(MonthlyRollup.id))) == 3
+        assert not check_rollup()
@@ -0,0 +1,47 @@
+"""
+    Malformed dates are refused on entry and cannot break the ledger export.
+"""
+
+import io
+
+import pyarrow.parquet as pq
+
+from src import db
+from src.models import Category, Transaction
+
+def add_category(app):
+    with app.app_context():
+        category = Category(name='Food', category_type='expense')
+        db.session.add(category)
+        db.session.commit()
+        return category.id
+
+def test_transaction_with_a_malformed_date_is_refused(app):
+    category_id = add_category(app)
+
+    response = app.test_client().post('/home-transaction', data={
+        'transaction_date': '2026-02-30', 'transaction_category': str(category_id),
+        'transaction_amount': '10', 'transaction_description': 'Lunch',
+        'transaction_currency': 'BGN'
+    })
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count(Transaction.id))) == 0
+
+def test_ledger_export_writes_malformed_dates_as_null(app):
+    category_id = add_category(app)
+    with app.app_context():
+        db.session.add_all([
+            Transaction(date='2026-01-15', category_id=category_id, description='Lunch',
+                        amount=10.0, fingerprint='1'),
+            Transaction(date='15.01.2026', category_id=category_id, description='Dinner',
+                        amount=20.0, fingerprint='2')
+        ])
+        db.session.commit()
+
+    response = app.test_client().get('/report-ledger')
+
+    assert response.status_code == 200
+    dates = pq.read_table(io.BytesIO(response.data), columns=['date'])['date'].to_pylist()
+    assert [str(date) if date else None for date in dates] == ['2026-01-15', None]